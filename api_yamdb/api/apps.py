@@ -1,5 +1,11 @@
 from django.apps import AppConfig
+from django.db.backends.signals import connection_created
 
 
 class ApiConfig(AppConfig):
     name = 'api'
+
+    def ready(self):
+        from . import cards  # noqa: F401 (подключает обработчики)
+        from . import sqlstats
+        connection_created.connect(sqlstats.install)
@@ -0,0 +1,259 @@
+"""Кэш и условные GET для ответов на чтение, привязанные к версиям данных.
+
+Отпечаток ответа складывается из схемы, хоста, пути, отсортированных
+параметров запроса и формата ответа. По нему хранится запись
+(версии, тело, тип) из reviews/versions.py, а вместе с версиями
+он служит ETag; самая свежая версия — Last-Modified. Запись поднимает
+версию, и запись в кэше становится устаревшей, поэтому срок жизни
+нужен только для того, чтобы освобождать место.
+
+В режиме stale_while_revalidate устаревший ответ отдаётся, пока один
+запрос на процесс, а с RESPONSE_CACHE_LOCK_DIR — на хост, его
+перестраивает. Одинаковые запросы при пустом кэше ждут этот запрос,
+и БД получает один запрос на ключ.
+"""
+import os
+import threading
+import time
+from hashlib import md5
+from urllib.parse import urlencode
+
+from django.conf import settings
+from django.core.cache import cache
+from django.http import HttpResponse
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
+
+from reviews.versions import get_versions
+
+from .metrics import cache_result
+
+try:
+    import fcntl
+except ImportError:
+    # Без flock перестройка ограничивается одним запросом на процесс.
+    fcntl = None
+
+LOCK_POLL_INTERVAL = 0.01
+# Ключи делят постоянный набор файлов блокировок, иначе каждый новый
+# URL оставлял бы в каталоге свой файл. Ключи одного файла
+# перестраиваются на хосте по очереди.
+LOCK_FILES = 256
+# Отметки о ETag, выданных с ответом 200.
+ISSUED_PREFIX = 'etag:'
+
+
+class RebuildLock:
+    """Право перестроить один ключ: в процессе и, через flock, на хосте."""
+
+    _guard = threading.Lock()
+    # Ключ -> [блокировка потоков, число держащих и ждущих].
+    _locks = {}
+
+    def __init__(self, key):
+        self.key = key
+        self.file = None
+        self.held = False
+        with self._guard:
+            entry = self._locks.setdefault(key, [threading.Lock(), 0])
+            entry[1] += 1
+        self.lock = entry[0]
+
+    def path(self):
+        """Файл блокировки ключа из набора LOCK_FILES."""
+        slot = int(md5(self.key.encode()).hexdigest(), 16) % LOCK_FILES
+        return os.path.join(settings.RESPONSE_CACHE_LOCK_DIR,
+                            f'{slot:03d}.lock')
+
+    def acquire(self, timeout=0):
+        """Ждёт не дольше timeout секунд, 0 — только попытка."""
+        deadline = time.monotonic() + timeout
+        if timeout:
+            acquired = self.lock.acquire(timeout=timeout)
+        else:
+            acquired = self.lock.acquire(blocking=False)
+        if not acquired:
+            return False
+        if not settings.RESPONSE_CACHE_LOCK_DIR or fcntl is None:
+            self.held = True
+            return True
+        os.makedirs(settings.RESPONSE_CACHE_LOCK_DIR, exist_ok=True)
+        self.file = open(self.path(), 'a')
+        while True:
+            try:
+                fcntl.flock(self.file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                self.held = True
+                return True
+            except BlockingIOError:
+                if time.monotonic() >= deadline:
+                    self.file.close()
+                    self.file = None
+                    self.lock.release()
+                    return False
+                time.sleep(LOCK_POLL_INTERVAL)
+
+    def close(self):
+        """Отпускает блокировку, если она взята, и забывает ключ."""
+        if self.held:
+            if self.file is not None:
+                # Закрытие файла снимает flock.
+                self.file.close()
+                self.file = None
+            self.lock.release()
+            self.held = False
+        with self._guard:
+            entry = self._locks[self.key]
+            entry[1] -= 1
+            if not entry[1]:
+                del self._locks[self.key]
+
+
+class VersionedCacheMixin:
+    """Отвечает на GET по версиям cache_versions без обработчика.
+
+    Для conditional_actions выставляются ETag и Last-Modified,
+    а совпавшие If-None-Match и If-Modified-Since получают 304,
+    если ответ с этим ETag уже отдавался со статусом 200.
+    Ответы cached_actions в формате json хранятся в кэше Django.
+    Права проверяются раньше, поэтому в кэш попадают только ответы,
+    одинаковые для всех, кому чтение разрешено; ответы personal_actions
+    зависят от пользователя и только получают свой ETag.
+    """
+
+    cache_versions = ()
+    cached_actions = ('list', 'retrieve')
+    conditional_actions = ('list', 'retrieve')
+    personal_actions = ()
+    stale_while_revalidate = False
+
+    def get_cache_versions(self):
+        return self.cache_versions
+
+    def response_fingerprint(self, request, *extra):
+        query = urlencode(sorted(request.query_params.lists()), doseq=True)
+        # Ссылки пагинации абсолютные и строятся по Host запроса,
+        # поэтому схема и хост тоже входят в ключ.
+        return md5('|'.join(map(str, (
+            request.scheme, request.get_host(), f'{request.path}?{query}',
+            request.accepted_renderer.format, *extra
+        ))).encode()).hexdigest()
+
+    def replace_handler(self, request, response):
+        # Обработчик подменяется только у этого экземпляра view.
+        setattr(self, request.method.lower(), lambda *args, **kwargs: response)
+
+    def serve_cached(self, request, entry):
+        _, content, content_type = entry
+        self.response_cache = None
+        self.replace_handler(request, HttpResponse(
+            content, content_type=content_type
+        ))
+
+    def lookup(self, request, key, versions):
+        """Ищет ответ в кэше; без свежего запоминает, куда его сохранить."""
+        entry = cache.get(key)
+        fresh = entry is not None and entry[0] == versions
+        cache_result('response', fresh)
+        if fresh:
+            self.serve_cached(request, entry)
+            return
+        self.response_cache = (key, versions)
+        if not self.stale_while_revalidate:
+            return
+        # Устаревший ответ не ждёт: перестраивает тот, кто взял
+        # блокировку, остальные отдают старое тело. Пустой кэш
+        # ждёт перестройки, чтобы не считать один ответ много раз.
+        self.rebuild_lock = RebuildLock(key)
+        if not self.rebuild_lock.acquire(
+            0 if entry is not None else settings.RESPONSE_CACHE_LOCK_TIMEOUT
+        ):
+            if entry is not None:
+                # Валидаторы относятся к новым версиям, не к этому телу.
+                self.validators = None
+                self.serve_cached(request, entry)
+            return
+        # Пока ждали блокировку, ответ мог перестроить другой запрос.
+        entry = cache.get(key)
+        if entry is not None and entry[0] == versions:
+            self.serve_cached(request, entry)
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        self.response_cache = self.validators = None
+        conditional = (
+            settings.CONDITIONAL_GET
+            and self.action in self.conditional_actions
+        )
+        cached = (
+            settings.RESPONSE_CACHE
+            and request.method == 'GET'
+            and self.action in self.cached_actions
+            and self.action not in self.personal_actions
+            and request.accepted_renderer.format == 'json'
+        )
+        if request.method not in ('GET', 'HEAD') or not (
+            conditional or cached
+        ):
+            return
+        # Версии читаются до запросов к БД: если запись случится
+        # между ними, ответ сохранится со старыми версиями.
+        versions = get_versions(self.get_cache_versions())
+
+        if conditional:
+            user = request.user.pk if (
+                self.action in self.personal_actions
+            ) else ''
+            # Версии — микросекунды, Last-Modified точен до секунды,
+            # поэтому при If-None-Match он не проверяется.
+            self.validators = (
+                quote_etag(self.response_fingerprint(request, versions, user)),
+                max(versions) // 1000000
+            )
+            # Версии не говорят, существует ли объект и верны ли фильтры.
+            # Это известно, только если такой ETag уже ушёл с ответом 200.
+            if cache.get(ISSUED_PREFIX + self.validators[0]) is not None:
+                response = get_conditional_response(
+                    request._request, *self.validators
+                )
+                if response is not None:
+                    self.replace_handler(request, response)
+                    return
+
+        if cached:
+            self.lookup(
+                request, 'response:' + self.response_fingerprint(request),
+                versions
+            )
+
+    def dispatch(self, request, *args, **kwargs):
+        self.rebuild_lock = None
+        try:
+            return super().dispatch(request, *args, **kwargs)
+        finally:
+            if self.rebuild_lock is not None:
+                self.rebuild_lock.close()
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(
+            request, response, *args, **kwargs
+        )
+        if response.status_code not in (200, 304):
+            return response
+        if getattr(self, 'validators', None) is not None:
+            etag, last_modified = self.validators
+            response['ETag'] = etag
+            response['Last-Modified'] = http_date(last_modified)
+            if response.status_code == 200:
+                cache.add(ISSUED_PREFIX + etag, True,
+                          settings.RESPONSE_CACHE_TIMEOUT)
+        if getattr(self, 'response_cache', None) is not None and (
+            response.status_code == 200
+        ):
+            key, versions = self.response_cache
+            if hasattr(response, 'render'):
+                response.render()
+            cache.set(
+                key, (versions, response.content, response['Content-Type']),
+                settings.RESPONSE_CACHE_TIMEOUT
+            )
+        return response
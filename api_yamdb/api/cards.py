@@ -0,0 +1,94 @@
+"""Готовые JSON-карточки произведений.
+
+Карточка — вывод TitleReadSerializer, сохранённый в Title.card.
+Изменения произведения, его жанров, категории и рейтинга присылают
+сигнал titles_changed, и карточки перестраиваются после фиксации
+транзакции. Ответы со списком и одним произведением склеиваются
+из карточек без сериализаторов. Пустая карточка ещё не построена
+и строится при первом чтении.
+"""
+import json
+
+from django.dispatch import receiver
+from rest_framework.renderers import JSONRenderer
+from rest_framework.utils import encoders
+
+from reviews.models import Title
+from reviews.signals import titles_changed
+from reviews.transactions import on_commit_merged
+from reviews.versions import TITLES, bump_version
+
+from .serializers import TitleReadSerializer
+
+BATCH_SIZE = 500
+
+
+def dumps(value):
+    # Так же, как JSONRenderer с настройками по умолчанию.
+    return json.dumps(value, cls=encoders.JSONEncoder, ensure_ascii=False,
+                      separators=(',', ':'))
+
+
+def render_cards(title_ids, only_empty=False):
+    """Строит карточки произведений и сохраняет их; возвращает по pk.
+
+    С only_empty записываются только карточки, которые всё ещё пусты.
+    """
+    titles = list(
+        Title.objects.filter(pk__in=title_ids)
+        .select_related('category').prefetch_related('genre')
+    )
+    renderer = JSONRenderer()
+    for title in titles:
+        title.card = renderer.render(
+            TitleReadSerializer(title).data
+        ).decode()
+    queryset = Title.objects.filter(card='') if only_empty else Title.objects
+    queryset.bulk_update(titles, ['card'], batch_size=BATCH_SIZE)
+    return {title.pk: title.card for title in titles}
+
+
+def fill_cards(titles):
+    """Карточки в порядке titles, недостающие строятся на месте."""
+    missing = [title.pk for title in titles if not title.card]
+    if missing:
+        # Между чтением и записью refresh_cards мог записать свежую
+        # карточку: чтение не затирает её своей, возможно старой.
+        cards = render_cards(missing, only_empty=True)
+        for title in titles:
+            title.card = title.card or cards[title.pk]
+    return [title.card for title in titles]
+
+
+def join_cards(cards):
+    return '[' + ','.join(cards) + ']'
+
+
+def render_page(data, cards):
+    """JSON страницы пагинатора, results подставляются готовыми."""
+    return '{' + ','.join(
+        dumps(key) + ':' + (
+            join_cards(cards) if key == 'results' else dumps(value)
+        )
+        for key, value in data.items()
+    ) + '}'
+
+
+def refresh_cards(title_ids):
+    if title_ids is None:
+        # Перестройка всех карточек сразу дорога: их проще сбросить
+        # и достроить при чтении.
+        Title.objects.exclude(card='').update(card='')
+    else:
+        render_cards({pk for pk in title_ids if pk is not None})
+    # Версия поднимается после записи карточек, иначе кэш ответов
+    # мог бы сохранить старую карточку под новой версией.
+    bump_version(TITLES)
+
+
+@receiver(titles_changed)
+def schedule_refresh(sender, title_ids, **kwargs):
+    # Жанры записываются уже после post_save произведения, поэтому
+    # карточки строятся по зафиксированным данным, и все изменения
+    # транзакции перестраивают их одним проходом.
+    on_commit_merged('cards', title_ids, refresh_cards)
@@ -0,0 +1,47 @@
+from rest_framework.relations import (MANY_RELATION_KWARGS, ManyRelatedField,
+                                      SlugRelatedField)
+
+
+class CatalogManyRelatedField(ManyRelatedField):
+    """Разрешает весь список slug одним обращением к справочнику."""
+
+    def to_internal_value(self, data):
+        if isinstance(data, str) or not hasattr(data, '__iter__'):
+            self.fail('not_a_list', input_type=type(data).__name__)
+        if not self.allow_empty and len(data) == 0:
+            self.fail('empty')
+        found, missing = self.child_relation.catalog.resolve(
+            str(item) for item in data
+        )
+        if missing:
+            self.child_relation.fail(
+                'does_not_exist',
+                slug_name=self.child_relation.slug_field,
+                value=', '.join(missing)
+            )
+        return found
+
+
+class CatalogSlugRelatedField(SlugRelatedField):
+    """SlugRelatedField, который ищет объект в справочнике процесса."""
+
+    def __init__(self, catalog, **kwargs):
+        self.catalog = catalog
+        kwargs.setdefault('slug_field', 'slug')
+        kwargs.setdefault('queryset', catalog.model.objects.all())
+        super().__init__(**kwargs)
+
+    def to_internal_value(self, data):
+        obj = self.catalog.get(str(data))
+        if obj is None:
+            self.fail('does_not_exist', slug_name=self.slug_field,
+                      value=data)
+        return obj
+
+    @classmethod
+    def many_init(cls, *args, **kwargs):
+        list_kwargs = {'child_relation': cls(*args, **kwargs)}
+        for key in kwargs:
+            if key in MANY_RELATION_KWARGS:
+                list_kwargs[key] = kwargs[key]
+        return CatalogManyRelatedField(**list_kwargs)
@@ -1,24 +1,37 @@
 import django_filters
 
-from reviews.models import Category, Genre, Title
+from reviews.catalog import category_catalog, genre_catalog
+from reviews.fields import normalize
+from reviews.models import Title
+
+# Больше любого символа в UTF-8, верхняя граница диапазона префикса.
+MAX_CHAR = chr(0x10FFFF)
 
 
 class TitleFilter(django_filters.FilterSet):
-    genre = django_filters.ModelMultipleChoiceFilter(
+    genre = django_filters.MultipleChoiceFilter(
         field_name='genre__slug',
-        to_field_name='slug',
-        queryset=Genre.objects.all(),
+        choices=genre_catalog.choices,
     )
-    category = django_filters.ModelMultipleChoiceFilter(
+    category = django_filters.MultipleChoiceFilter(
         field_name='category__slug',
-        to_field_name='slug',
-        queryset=Category.objects.all(),
-    )
-    name = django_filters.CharFilter(
-        field_name='name', lookup_expr='icontains'
+        choices=category_catalog.choices,
     )
+    name = django_filters.CharFilter(method='filter_name')
+    name_prefix = django_filters.CharFilter(method='filter_name_prefix')
     year = django_filters.NumberFilter(field_name='year')
 
     class Meta:
         model = Title
-        fields = ('category', 'genre', 'name', 'year',)
+        fields = ('category', 'genre', 'name', 'name_prefix', 'year',)
+
+    def filter_name(self, queryset, name, value):
+        return queryset.filter(search_name__contains=normalize(value))
+
+    def filter_name_prefix(self, queryset, name, value):
+        # Диапазон вместо LIKE: так индекс search_name работает
+        # на любой СУБД, а в SQLite LIKE индекс не использует.
+        prefix = normalize(value)
+        return queryset.filter(
+            search_name__gte=prefix, search_name__lt=prefix + MAX_CHAR
+        )
@@ -0,0 +1,295 @@
+import json
+import math
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from django.contrib.auth import get_user_model
+from django.contrib.auth.tokens import default_token_generator
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from api.management.scenarios import read_paths, sample
+from reviews.models import Review, Title
+
+User = get_user_model()
+
+PREFIX = 'bench-'
+
+
+def percentile(values, percent):
+    """Перцентиль по ближайшему рангу, values отсортированы."""
+    if not values:
+        return None
+    rank = max(math.ceil(percent / 100 * len(values)), 1)
+    return values[rank - 1]
+
+
+def summarize(latencies, errors, elapsed):
+    latencies = sorted(latencies)
+    total = len(latencies)
+    return {
+        'requests': total,
+        'errors': errors,
+        'throughput': round(total / elapsed, 1) if elapsed else None,
+        'mean': round(sum(latencies) / total, 2) if total else None,
+        'p50': percentile(latencies, 50),
+        'p95': percentile(latencies, 95),
+        'p99': percentile(latencies, 99),
+    }
+
+
+def error_rate(result):
+    return result.get('errors', 0) / (result.get('requests') or 1)
+
+
+def compare(report, baseline, threshold):
+    """Регрессии: выросли доля ошибок или p95, упала пропускная способность."""
+    regressions = []
+    for name, result in report['scenarios'].items():
+        base = baseline['scenarios'].get(name)
+        if not base:
+            continue
+        # Быстрые ответы 4xx и 5xx не должны сойти за ускорение.
+        if error_rate(result) > error_rate(base):
+            regressions.append(
+                f'{name}: errors {base.get("errors", 0)}/'
+                f'{base.get("requests", "?")} -> '
+                f'{result["errors"]}/{result["requests"]}'
+            )
+        if not base['p95'] or not result['p95']:
+            continue
+        if result['p95'] > base['p95'] * (1 + threshold):
+            regressions.append(
+                f'{name}: p95 {base["p95"]} -> {result["p95"]} ms'
+            )
+        if result['throughput'] < base['throughput'] * (1 - threshold):
+            regressions.append(
+                f'{name}: throughput {base["throughput"]} -> '
+                f'{result["throughput"]} req/s'
+            )
+    return regressions
+
+
+class Scenario:
+    def __init__(self, name, method, path, token=None, body=None):
+        self.name = name
+        self.method = method
+        self.path = path
+        self.token = token
+        self.body = body
+
+    def request(self, number):
+        path = self.path(number) if callable(self.path) else self.path
+        body = self.body(number) if callable(self.body) else self.body
+        headers = {}
+        if self.token:
+            headers['Authorization'] = f'Bearer {self.token}'
+        return self.method, path, body, headers
+
+
+class Command(BaseCommand):
+    help = 'Measure latency and throughput of api/v1 on a running server'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--url', type=str, default='http://127.0.0.1:8000/api/v1',
+            help="API root of a running server on the same database"
+        )
+        parser.add_argument(
+            '--requests', type=int, default=200,
+            help="measured requests per scenario"
+        )
+        parser.add_argument('--warmup', type=int, default=10)
+        parser.add_argument('--concurrency', type=int, default=8)
+        parser.add_argument(
+            '--scenario', action='append', default=[],
+            help="run only scenarios starting with this name, repeatable"
+        )
+        parser.add_argument(
+            '--output', type=str, help="file for the JSON report"
+        )
+        parser.add_argument(
+            '--baseline', type=str, help="report of a previous run"
+        )
+        parser.add_argument(
+            '--threshold', type=float, default=0.2,
+            help="allowed relative p95 and throughput regression"
+        )
+        parser.add_argument(
+            '--keep', action='store_true',
+            help="do not delete objects created by the benchmark"
+        )
+
+    def setup(self):
+        """Готовит пользователей, токены и данные для сценариев."""
+        self.context = context = sample()
+        admin, _ = User.objects.get_or_create(
+            username=f'{PREFIX}admin',
+            defaults={'email': f'{PREFIX}admin@yamdb.fake', 'role': 'admin'}
+        )
+        user, _ = User.objects.get_or_create(
+            username=f'{PREFIX}user',
+            defaults={'email': f'{PREFIX}user@yamdb.fake', 'role': 'user'}
+        )
+        own_title = Title.objects.create(
+            name=f'{PREFIX}{self.run}', year=context['year'],
+            description='benchmark', category=context['title'].category
+        )
+        own_review = Review.objects.create(
+            title=own_title, author=user, text='benchmark', score=5
+        )
+        context.update({
+            'own_title': own_title,
+            'own_review': own_review,
+            'admin_token': str(RefreshToken.for_user(admin).access_token),
+            'user_token': str(RefreshToken.for_user(user).access_token),
+            'user': user,
+            'code': default_token_generator.make_token(user),
+        })
+
+    def scenarios(self):
+        ctx = self.context
+        own_title, own_review = ctx['own_title'].pk, ctx['own_review'].pk
+        run = self.run
+        result = [
+            Scenario(name, 'GET', path, token=ctx['admin_token']
+                     if name.startswith('users') else None)
+            for name, path in read_paths(ctx)
+        ]
+        result += [
+            Scenario(
+                'title_create', 'POST', '/titles/', token=ctx['admin_token'],
+                body=lambda number: {
+                    'name': f'{PREFIX}{run}-{number}',
+                    'year': ctx['year'], 'description': 'benchmark',
+                    'genre': [ctx['genre']], 'category': ctx['category'],
+                }
+            ),
+            Scenario(
+                'review_update', 'PATCH',
+                f'/titles/{own_title}/reviews/{own_review}/',
+                token=ctx['user_token'],
+                body=lambda number: {'score': number % 10 + 1}
+            ),
+            Scenario(
+                'comment_create', 'POST',
+                f'/titles/{own_title}/reviews/{own_review}/comments/',
+                token=ctx['user_token'], body={'text': 'benchmark'}
+            ),
+            Scenario(
+                'auth_signup', 'POST', '/auth/signup/',
+                body=lambda number: {
+                    'username': f'{PREFIX}{run}-{number}',
+                    'email': f'{PREFIX}{run}-{number}@yamdb.fake',
+                }
+            ),
+            Scenario(
+                'auth_token', 'POST', '/auth/token/',
+                body={'username': ctx['user'].username,
+                      'confirmation_code': ctx['code']}
+            ),
+        ]
+        if self.only:
+            result = [
+                scenario for scenario in result
+                if scenario.name.startswith(self.only)
+            ]
+        return result
+
+    def session(self):
+        # У каждого потока своё keep-alive соединение.
+        if not hasattr(self.local, 'session'):
+            self.local.session = requests.Session()
+        return self.local.session
+
+    def send(self, scenario, number):
+        method, path, body, headers = scenario.request(number)
+        started = time.perf_counter()
+        response = self.session().request(
+            method, self.url + path, json=body, headers=headers
+        )
+        latency = (time.perf_counter() - started) * 1000
+        return latency, response.status_code, response.text
+
+    def measure(self, scenario):
+        # Номера запросов сквозные, чтобы имена в POST не повторялись.
+        warmup = range(self.counter, self.counter + self.warmup)
+        measured = range(warmup.stop, warmup.stop + self.requests)
+        self.counter = measured.stop
+        latencies, errors = [], 0
+        with ThreadPoolExecutor(max_workers=self.concurrency) as executor:
+            list(executor.map(lambda n: self.send(scenario, n), warmup))
+            started = time.perf_counter()
+            for latency, status, text in executor.map(
+                lambda n: self.send(scenario, n), measured
+            ):
+                latencies.append(round(latency, 2))
+                if status >= 400:
+                    errors += 1
+                    if errors == 1:
+                        self.stderr.write(
+                            f'{scenario.name}: {status} {text[:200]}'
+                        )
+            elapsed = time.perf_counter() - started
+        return summarize(latencies, errors, elapsed)
+
+    def cleanup(self):
+        Title.objects.filter(name__startswith=PREFIX).delete()
+        User.objects.filter(username__startswith=f'{PREFIX}{self.run}-') \
+            .delete()
+
+    def handle(self, *args, **options):
+        if min(options['requests'], options['concurrency']) < 1:
+            raise CommandError('--requests and --concurrency must be positive')
+        self.url = options['url'].rstrip('/')
+        self.requests = options['requests']
+        self.warmup = max(options['warmup'], 0)
+        self.concurrency = options['concurrency']
+        self.only = tuple(options['scenario'])
+        self.run = int(time.time()) % 100000
+        self.local = threading.local()
+        self.counter = 0
+        baseline = None
+        if options['baseline']:
+            with open(options['baseline'], encoding='utf-8') as file:
+                baseline = json.load(file)
+
+        self.setup()
+        report = {
+            'url': self.url,
+            'requests': self.requests,
+            'concurrency': self.concurrency,
+            'started': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'scenarios': {},
+        }
+        try:
+            for scenario in self.scenarios():
+                result = self.measure(scenario)
+                report['scenarios'][scenario.name] = result
+                if options['verbosity']:
+                    self.stdout.write(
+                        f'{scenario.name:<40} {result["throughput"]:>8} '
+                        f'req/s  p50 {result["p50"]:>8}  '
+                        f'p95 {result["p95"]:>8}  p99 {result["p99"]:>8} ms'
+                        f'  errors {result["errors"]}'
+                    )
+        finally:
+            if not options['keep']:
+                self.cleanup()
+
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as file:
+                json.dump(report, file, indent=2)
+        else:
+            self.stdout.write(json.dumps(report, indent=2))
+
+        if baseline is not None:
+            regressions = compare(report, baseline, options['threshold'])
+            if regressions:
+                raise CommandError(
+                    'Regressions against the baseline:\n'
+                    + '\n'.join(regressions)
+                )
+            self.stdout.write('No regressions against the baseline')
@@ -0,0 +1,159 @@
+import re
+from urllib.parse import urlsplit
+
+from django.apps import apps
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import override_settings
+from django.urls import resolve
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from api.management.scenarios import read_paths, sample
+
+User = get_user_model()
+
+API_ROOT = '/api/v1'
+
+# Признаки плана, которые стоит проверить: полный просмотр таблицы,
+# сортировка во временном B-дереве и индекс, построенный на лету.
+# Группа table отсекает просмотр подзапросов и CTE.
+FLAGS = {
+    'sqlite': (
+        ('full scan', re.compile(
+            r'\bSCAN (?:TABLE )?(?P<table>\w+)(?!.*\bUSING\b)'
+        )),
+        ('temp b-tree', re.compile(r'\bUSE TEMP B-TREE\b')),
+        ('automatic index', re.compile(r'\bAUTOMATIC (?:COVERING )?INDEX\b')),
+    ),
+    'postgresql': (
+        ('full scan', re.compile(r'\bSeq Scan on (?P<table>\w+)')),
+        ('sort', re.compile(r'\bSort\b(?! Key)')),
+    ),
+}
+
+
+class Command(BaseCommand):
+    help = 'Run EXPLAIN on the queries behind each API read endpoint'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--scenario', action='append', default=[],
+            help="only endpoints starting with this name, repeatable"
+        )
+        parser.add_argument(
+            '--all', action='store_true',
+            help="print plans of queries without findings too"
+        )
+        parser.add_argument(
+            '--fail', action='store_true',
+            help="exit with an error when any query is flagged"
+        )
+
+    def capture(self, path):
+        """Выполняет GET через view и возвращает его SELECT-запросы."""
+        request = self.factory.get(API_ROOT + path)
+        force_authenticate(request, user=self.user)
+        match = resolve(urlsplit(API_ROOT + path).path)
+        queries = {}
+
+        def wrapper(execute, sql, params, many, context):
+            if sql.lstrip().upper().startswith('SELECT'):
+                queries.setdefault(sql, params)
+            return execute(sql, params, many, context)
+
+        # Ответ из кэша не показал бы запросов, которые он заменяет.
+        with override_settings(RESPONSE_CACHE=False), \
+                connection.execute_wrapper(wrapper):
+            response = match.func(request, *match.args, **match.kwargs)
+            if hasattr(response, 'render'):
+                response.render()
+        if response.status_code != 200:
+            raise CommandError(
+                f'GET {path} answered {response.status_code}'
+            )
+        return queries
+
+    def explain(self, sql, params):
+        prefix = connection.ops.explain_query_prefix()
+        with connection.cursor() as cursor:
+            cursor.execute(f'{prefix} {sql}', params)
+            return [str(row[-1]) for row in cursor.fetchall()]
+
+    def pk_order_limited(self, sql, table):
+        """Запрос берёт первые строки по первичному ключу таблицы.
+
+        Такой просмотр идёт в порядке ключа и кончается на LIMIT,
+        а не читает всю таблицу.
+        """
+        pk = self.primary_keys.get(table)
+        return pk is not None and re.search(
+            rf'\bORDER BY "{table}"\."{pk}"(?: ASC| DESC)?\s+LIMIT\b', sql
+        ) is not None
+
+    def findings(self, sql, plan):
+        result = []
+        for line in plan:
+            for name, pattern in self.flags:
+                match = pattern.search(line)
+                if match is None:
+                    continue
+                table = match.groupdict().get('table')
+                if table is not None and (
+                    table not in self.tables
+                    or self.pk_order_limited(sql, table)
+                ):
+                    continue
+                result.append((name, line))
+        return result
+
+    def report(self, name, path, queries):
+        flagged = 0
+        self.stdout.write(self.style.MIGRATE_HEADING(f'{name}: GET {path}'))
+        for sql, params in queries.items():
+            plan = self.explain(sql, params)
+            findings = self.findings(sql, plan)
+            if not findings and not self.show_all:
+                continue
+            flagged += bool(findings)
+            self.stdout.write(f'  {sql}')
+            for line in plan:
+                self.stdout.write(f'    {line}')
+            for flag, line in findings:
+                self.stdout.write(self.style.WARNING(f'    ! {flag}: {line}'))
+        return flagged
+
+    def handle(self, *args, **options):
+        self.flags = FLAGS.get(connection.vendor, ())
+        if not self.flags:
+            self.stderr.write(
+                f'No plan checks for {connection.vendor}, printing plans only'
+            )
+        self.show_all = options['all'] or not self.flags
+        self.tables = set(connection.introspection.table_names())
+        self.primary_keys = {
+            model._meta.db_table: model._meta.pk.column
+            for model in apps.get_models()
+        }
+        self.factory = APIRequestFactory()
+        # Несохранённый админ, чтобы проверялись права. Запросы
+        # выполняются по-настоящему: например, пустые карточки
+        # произведений при этом строятся и записываются.
+        self.user = User(username='explainqueries', role='admin')
+        only = tuple(options['scenario'])
+
+        flagged = {}
+        for name, path in read_paths(sample()):
+            if only and not name.startswith(only):
+                continue
+            count = self.report(name, path, self.capture(path))
+            if count:
+                flagged[name] = count
+
+        total = sum(flagged.values())
+        self.stdout.write(
+            f'{total} flagged queries in {len(flagged)} endpoints'
+            + (': ' + ', '.join(flagged) if flagged else '')
+        )
+        if options['fail'] and total:
+            raise CommandError('Query plans need attention')
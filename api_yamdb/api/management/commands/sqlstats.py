@@ -0,0 +1,38 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from api.sqlstats import ORDERS, sql_stats
+
+
+class Command(BaseCommand):
+    help = 'Show the heaviest SQL fingerprints collected by the server'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--limit', type=int, default=20)
+        parser.add_argument('--order', choices=ORDERS, default='total')
+        parser.add_argument(
+            '--width', type=int, default=120,
+            help="query text is cut to this many characters"
+        )
+
+    def handle(self, *args, **options):
+        if not settings.METRICS_DIR:
+            raise CommandError(
+                'Set METRICS_DIR for the server and this command, '
+                'statistics are read from the dumps there'
+            )
+        rows = sql_stats.top(options['limit'], options['order'],
+                             current=False)
+        if not rows:
+            self.stdout.write('No statistics, is SQL_STATS on?')
+            return
+        self.stdout.write(
+            f'{"calls":>8} {"total ms":>10} {"mean ms":>9} {"max ms":>9} '
+            f'{"rows":>8}  query'
+        )
+        for row in rows:
+            self.stdout.write(
+                f'{row["calls"]:>8} {row["total"]:>10.1f} '
+                f'{row["mean"]:>9.2f} {row["max"]:>9.2f} {row["rows"]:>8}  '
+                f'{row["query"][:options["width"]]}'
+            )
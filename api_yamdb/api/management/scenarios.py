@@ -0,0 +1,57 @@
+"""Чтения API, общие для benchapi и explainqueries."""
+from itertools import combinations
+
+from django.core.management.base import CommandError
+
+from api.filters import TitleFilter
+from reviews.models import Review, Title
+
+
+def filter_combinations():
+    """Все непустые сочетания фильтров TitleFilter."""
+    names = tuple(TitleFilter.base_filters)
+    for size in range(1, len(names) + 1):
+        yield from combinations(names, size)
+
+
+def sample():
+    """Самое обсуждаемое произведение, его отзыв и значения фильтров."""
+    title = Title.objects.filter(
+        category__isnull=False, genre__isnull=False
+    ).order_by('-rating_count', 'pk').first()
+    if title is None:
+        raise CommandError(
+            'No titles with a category and genres, run generatedata first'
+        )
+    review = Review.objects.filter(title=title).order_by('pk').first()
+    if review is None:
+        raise CommandError(f'Title {title.pk} has no reviews')
+    return {
+        'title': title,
+        'review': review,
+        'category': title.category.slug,
+        'genre': title.genre.all()[0].slug,
+        'name': title.name[1:-1] or title.name,
+        'name_prefix': title.name[:3],
+        'year': title.year,
+    }
+
+
+def read_paths(context):
+    """Пары (имя, путь от /api/v1) для GET-запросов к каждому viewset."""
+    title, review = context['title'].pk, context['review'].pk
+    paths = [('titles_list', '/titles/')]
+    for names in filter_combinations():
+        query = '&'.join(f'{name}={context[name]}' for name in names)
+        paths.append((f'titles_filter_{"_".join(names)}', f'/titles/?{query}'))
+    paths += [
+        ('title_detail', f'/titles/{title}/'),
+        ('reviews_list', f'/titles/{title}/reviews/'),
+        ('review_detail', f'/titles/{title}/reviews/{review}/'),
+        ('comments_list', f'/titles/{title}/reviews/{review}/comments/'),
+        ('categories_list', '/categories/'),
+        ('genres_list', '/genres/'),
+        ('users_list', '/users/'),
+        ('users_me', '/users/me/'),
+    ]
+    return paths
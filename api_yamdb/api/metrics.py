@@ -0,0 +1,277 @@
+"""Метрики в текстовом формате Prometheus.
+
+Счётчики и гистограммы живут в памяти процесса. Если задан
+METRICS_DIR, каждый процесс периодически сбрасывает снимок в свой
+файл metrics-<pid>.json, а при чтении метрик файлы всех процессов
+складываются.
+"""
+import json
+import os
+import threading
+import time
+from bisect import bisect_left
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.db import connections
+
+from reviews.catalog import category_catalog, genre_catalog
+
+from .timing import Timings
+
+LATENCY_BUCKETS = (
+    0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0,
+)
+QUERY_BUCKETS = (1, 2, 5, 10, 20, 50, 100)
+# Остальные методы считаются как other: метод задаёт клиент, и каждый
+# выдуманный завёл бы свои ряды метрик.
+METHODS = frozenset((
+    'GET', 'HEAD', 'POST', 'PUT', 'PATCH', 'DELETE', 'OPTIONS', 'TRACE',
+    'CONNECT',
+))
+
+
+def _labels(labels):
+    return tuple(sorted(labels.items()))
+
+
+def _format_labels(labels, extra=()):
+    items = [*labels, *extra]
+    if not items:
+        return ''
+    pairs = ','.join(
+        '{}="{}"'.format(name, str(value).replace('\\', '\\\\')
+                         .replace('"', '\\"').replace('\n', '\\n'))
+        for name, value in items
+    )
+    return '{' + pairs + '}'
+
+
+def due(owner):
+    """Пора ли владельцу снова сбросить снимок на диск."""
+    now = time.monotonic()
+    if now - owner.flushed < settings.METRICS_FLUSH_INTERVAL:
+        return False
+    owner.flushed = now
+    return True
+
+
+def write_snapshot(kind, data):
+    """Пишет снимок процесса в METRICS_DIR/<kind>-<pid>.json."""
+    os.makedirs(settings.METRICS_DIR, exist_ok=True)
+    path = os.path.join(settings.METRICS_DIR, f'{kind}-{os.getpid()}.json')
+    temp = f'{path}.{threading.get_ident()}.tmp'
+    with open(temp, 'w', encoding='utf-8') as file:
+        json.dump(data, file)
+    os.replace(temp, path)
+
+
+def read_snapshots(kind):
+    """Снимки всех процессов одного вида из METRICS_DIR."""
+    if not os.path.isdir(settings.METRICS_DIR):
+        return []
+    result = []
+    for name in sorted(os.listdir(settings.METRICS_DIR)):
+        if not (name.startswith(f'{kind}-') and name.endswith('.json')):
+            continue
+        try:
+            with open(os.path.join(settings.METRICS_DIR, name),
+                      encoding='utf-8') as file:
+                result.append(json.load(file))
+        except (OSError, ValueError):
+            # Файл удалили или не дописали: пропускаем до следующего раза.
+            continue
+    return result
+
+
+class Registry:
+    """Счётчики и гистограммы одного процесса.
+
+    Под блокировкой только обновление словаря, поэтому она почти
+    не конкурирует даже в многопоточном сервере.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.meta = {}
+        self.counters = {}
+        self.histograms = {}
+        self.collectors = []
+        self.flushed = 0.0
+
+    def counter(self, name, documentation):
+        self.meta[name] = ('counter', documentation, None)
+
+    def histogram(self, name, documentation, buckets):
+        self.meta[name] = ('histogram', documentation, tuple(buckets))
+
+    def collector(self, function):
+        """Функция, отдающая готовые значения счётчиков при чтении."""
+        self.collectors.append(function)
+        return function
+
+    def inc(self, name, value=1, **labels):
+        key = (name, _labels(labels))
+        with self.lock:
+            self.counters[key] = self.counters.get(key, 0) + value
+
+    def observe(self, name, value, **labels):
+        buckets = self.meta[name][2]
+        index = bisect_left(buckets, value)
+        key = (name, _labels(labels))
+        with self.lock:
+            # Корзины без накопления, последние два поля — сумма и число.
+            values = self.histograms.get(key)
+            if values is None:
+                values = self.histograms[key] = [0] * (len(buckets) + 3)
+            values[index] += 1
+            values[-2] += value
+            values[-1] += 1
+
+    def snapshot(self):
+        with self.lock:
+            counters = [
+                [name, labels, value]
+                for (name, labels), value in self.counters.items()
+            ]
+            histograms = [
+                [name, labels, list(values)]
+                for (name, labels), values in self.histograms.items()
+            ]
+        for function in self.collectors:
+            counters += [
+                [name, _labels(labels), value]
+                for name, labels, value in function()
+            ]
+        return {'counters': counters, 'histograms': histograms}
+
+    def flush(self, force=False):
+        """Сбрасывает снимок процесса в METRICS_DIR не чаще интервала."""
+        if settings.METRICS_DIR and (force or due(self)):
+            write_snapshot('metrics', self.snapshot())
+
+    def snapshots(self):
+        """Снимки всех процессов, свой — всегда свежий."""
+        if not settings.METRICS_DIR:
+            return [self.snapshot()]
+        self.flush(force=True)
+        return read_snapshots('metrics')
+
+    def merge(self, snapshots):
+        counters, histograms = {}, {}
+        for snapshot in snapshots:
+            for name, labels, value in snapshot['counters']:
+                key = (name, tuple(map(tuple, labels)))
+                counters[key] = counters.get(key, 0) + value
+            for name, labels, values in snapshot['histograms']:
+                key = (name, tuple(map(tuple, labels)))
+                total = histograms.setdefault(key, [0] * len(values))
+                for index, value in enumerate(values):
+                    total[index] += value
+        return counters, histograms
+
+    def render(self):
+        counters, histograms = self.merge(self.snapshots())
+        lines = []
+        for name, (kind, documentation, buckets) in sorted(self.meta.items()):
+            lines.append(f'# HELP {name} {documentation}')
+            lines.append(f'# TYPE {name} {kind}')
+            if kind == 'counter':
+                for (key, labels), value in sorted(counters.items()):
+                    if key == name:
+                        lines.append(
+                            f'{name}{_format_labels(labels)} {value}'
+                        )
+                continue
+            for (key, labels), values in sorted(histograms.items()):
+                if key != name:
+                    continue
+                cumulative = 0
+                for bound, count in zip((*buckets, '+Inf'), values):
+                    cumulative += count
+                    lines.append(
+                        f'{name}_bucket'
+                        f'{_format_labels(labels, [("le", bound)])} '
+                        f'{cumulative}'
+                    )
+                lines.append(f'{name}_sum{_format_labels(labels)} '
+                             f'{values[-2]}')
+                lines.append(f'{name}_count{_format_labels(labels)} '
+                             f'{values[-1]}')
+        return '\n'.join(lines) + '\n'
+
+
+registry = Registry()
+registry.counter('http_requests_total', 'Requests by route and status.')
+registry.counter('http_request_errors_total',
+                 'Requests answered with 5xx or an unhandled exception.')
+registry.histogram('http_request_duration_seconds',
+                   'Request latency by route.', LATENCY_BUCKETS)
+registry.histogram('db_queries_per_request',
+                   'SQL statements per request by route.', QUERY_BUCKETS)
+registry.histogram('db_query_duration_seconds',
+                   'Total SQL time per request by route.', LATENCY_BUCKETS)
+registry.counter('cache_requests_total', 'Cache lookups by result.')
+
+
+def cache_result(cache, hit):
+    registry.inc('cache_requests_total', cache=cache,
+                 result='hit' if hit else 'miss')
+
+
+@registry.collector
+def catalog_cache():
+    for catalog in (category_catalog, genre_catalog):
+        yield 'cache_requests_total', {
+            'cache': catalog.name, 'result': 'hit'
+        }, catalog.hits
+        yield 'cache_requests_total', {
+            'cache': catalog.name, 'result': 'miss'
+        }, catalog.misses
+
+
+def route_name(request):
+    match = getattr(request, 'resolver_match', None)
+    if match is None:
+        return 'unmatched'
+    return match.view_name or match.route
+
+
+def method_name(request):
+    return request.method if request.method in METHODS else 'other'
+
+
+class MetricsMiddleware:
+    """Считает запросы, задержку и запросы к БД по маршрутам api/urls.py."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not settings.METRICS:
+            return self.get_response(request)
+        started = time.perf_counter()
+        queries = Timings(trusted=False)
+        status = 500
+        try:
+            with ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(connection.execute_wrapper(queries))
+                response = self.get_response(request)
+            status = response.status_code
+            return response
+        finally:
+            route, method = route_name(request), method_name(request)
+            registry.inc('http_requests_total', route=route, method=method,
+                         status=status)
+            if status >= 500:
+                registry.inc('http_request_errors_total', route=route,
+                             method=method)
+            registry.observe('http_request_duration_seconds',
+                             time.perf_counter() - started,
+                             route=route, method=method)
+            registry.observe('db_queries_per_request', queries.queries,
+                             route=route)
+            registry.observe('db_query_duration_seconds', queries.db,
+                             route=route)
+            registry.flush()
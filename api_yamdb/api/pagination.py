@@ -1,13 +1,169 @@
-from rest_framework.pagination import PageNumberPagination
+from collections import OrderedDict
+from hashlib import md5
 
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import EmptyResultSet
+from django.core.paginator import EmptyPage, InvalidPage, Page, Paginator
+from django.utils.functional import cached_property
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import CursorPagination, PageNumberPagination
+from rest_framework.response import Response
 
-class UserPagination(PageNumberPagination):
+from .metrics import cache_result
+
+
+class CachedCountPaginator(Paginator):
+    """Кэширует COUNT(*) по тексту запроса, то есть по набору фильтров."""
+
+    @cached_property
+    def count(self):
+        timeout = settings.PAGINATION_COUNT_CACHE_TIMEOUT
+        query = getattr(self.object_list, 'query', None)
+        if not timeout or query is None:
+            return super().count
+        try:
+            sql, params = query.sql_with_params()
+        except EmptyResultSet:
+            return 0
+        key = 'pagination-count:' + md5(
+            f'{sql}{params}'.encode()
+        ).hexdigest()
+        count = cache.get(key)
+        cache_result('pagination-count', count is not None)
+        if count is None:
+            count = super().count
+            cache.set(key, count, timeout)
+        return count
+
+
+class CountlessPage(Page):
+    def __init__(self, object_list, number, paginator, has_next):
+        super().__init__(object_list, number, paginator)
+        self._has_next = has_next
+
+    def has_next(self):
+        return self._has_next
+
+    def next_page_number(self):
+        return self.number + 1
+
+
+class CountlessPaginator(Paginator):
+    """Определяет наличие следующей страницы по лишней строке."""
+
+    def validate_number(self, number):
+        try:
+            if isinstance(number, float) and not number.is_integer():
+                raise ValueError
+            number = int(number)
+        except (TypeError, ValueError):
+            raise InvalidPage('That page number is not an integer')
+        if number < 1:
+            raise EmptyPage('That page number is less than 1')
+        return number
+
+    def page(self, number):
+        number = self.validate_number(number)
+        bottom = (number - 1) * self.per_page
+        rows = list(self.object_list[bottom:bottom + self.per_page + 1])
+        if not rows and number > 1:
+            raise EmptyPage('That page contains no results')
+        return CountlessPage(
+            rows[:self.per_page], number, self, len(rows) > self.per_page
+        )
+
+
+class OptionalCountPagination(PageNumberPagination):
+    """Постраничная пагинация, где ?count=false убирает COUNT(*)."""
+
+    count_query_param = 'count'
+    django_paginator_class = CachedCountPaginator
+
+    def count_requested(self, request):
+        value = request.query_params.get(self.count_query_param)
+        if value is None:
+            return settings.PAGINATION_COUNT
+        return value.lower() not in ('0', 'false', 'no', 'off')
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.with_count = self.count_requested(request)
+        if self.with_count:
+            return super().paginate_queryset(queryset, request, view)
+
+        page_size = self.get_page_size(request)
+        if not page_size:
+            return None
+        paginator = CountlessPaginator(queryset, page_size)
+        page_number = request.query_params.get(self.page_query_param, 1)
+        try:
+            self.page = paginator.page(page_number)
+        except InvalidPage as exc:
+            msg = self.invalid_page_message.format(
+                page_number=page_number, message=str(exc)
+            )
+            raise NotFound(msg)
+        self.request = request
+        return list(self.page)
+
+    def get_paginated_response(self, data):
+        if self.with_count:
+            return super().get_paginated_response(data)
+        return Response(OrderedDict([
+            ('next', self.get_next_link()),
+            ('previous', self.get_previous_link()),
+            ('results', data)
+        ]))
+
+
+class KeysetPagination(CursorPagination):
+    ordering = 'pk'
+
+    def get_ordering(self, request, queryset, view):
+        # Порядок курсора не зависит от ?ordering, иначе ключ страницы
+        # перестанет совпадать с составным индексом (родитель, pk).
+        return (self.ordering,)
+
+
+class OptionalCursorPagination(OptionalCountPagination):
+    """Постраничная пагинация с переходом на курсорную по ?cursor=."""
+
+    cursor_query_param = 'cursor'
+    cursor_pagination_class = KeysetPagination
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.cursor_paginator = None
+        if self.cursor_query_param not in request.query_params:
+            return super().paginate_queryset(queryset, request, view)
+        self.cursor_paginator = self.cursor_pagination_class()
+        self.cursor_paginator.page_size = self.page_size
+        self.cursor_paginator.cursor_query_param = self.cursor_query_param
+        page = self.cursor_paginator.paginate_queryset(
+            queryset, request, view
+        )
+        self.display_page_controls = (
+            self.cursor_paginator.display_page_controls
+        )
+        return page
+
+    def get_paginated_response(self, data):
+        if self.cursor_paginator is not None:
+            return self.cursor_paginator.get_paginated_response(data)
+        return super().get_paginated_response(data)
+
+    def get_html_context(self):
+        if self.cursor_paginator is not None:
+            return self.cursor_paginator.get_html_context()
+        return super().get_html_context()
+
+
+class UserPagination(OptionalCountPagination):
     page_size = 5
 
 
-class ReviewsPagination(PageNumberPagination):
+class ReviewsPagination(OptionalCursorPagination):
     page_size = 8
 
 
-class CommentsPagination(PageNumberPagination):
+class CommentsPagination(OptionalCursorPagination):
     page_size = 4
@@ -1,3 +1,4 @@
+from django.conf import settings
 from rest_framework import permissions
 
 
@@ -36,3 +37,13 @@ class IsOwnerPermission(permissions.BasePermission):
 class ReadOnlyPermission(permissions.BasePermission):
     def has_permission(self, request, view):
         return request.method in permissions.SAFE_METHODS
+
+
+class MetricsPermission(permissions.BasePermission):
+    """Метрики читают админы и сборщик с адресов METRICS_ALLOWED_IPS."""
+
+    def has_permission(self, request, view):
+        if request.META.get('REMOTE_ADDR') in settings.METRICS_ALLOWED_IPS:
+            return True
+        return (request.user and request.user.is_authenticated
+                and request.user.is_admin)
@@ -1,10 +1,14 @@
 from django.contrib.auth import get_user_model
+from django.db import transaction
 from rest_framework import serializers
 from rest_framework.generics import get_object_or_404
 from rest_framework.relations import SlugRelatedField
 
+from reviews.catalog import category_catalog, genre_catalog
 from reviews.models import Comment, Review, Title, Category, Genre
 
+from .fields import CatalogSlugRelatedField
+
 User = get_user_model()
 
 
@@ -35,7 +39,7 @@ class SignupSerializer(serializers.Serializer):
 
 class TokenSerializer(serializers.Serializer):
     username = serializers.CharField(max_length=150)
-    confirmation_code = serializers.CharField(max_length=20)
+    confirmation_code = serializers.CharField(max_length=64)
 
 
 class UserSerializer(serializers.ModelSerializer):
@@ -77,15 +81,8 @@ class TitleReadSerializer(serializers.ModelSerializer):
 
 class TitleWriteSerializer(serializers.ModelSerializer):
     rating = serializers.IntegerField(read_only=True)
-    genre = serializers.SlugRelatedField(
-        many=True,
-        slug_field='slug',
-        queryset=Genre.objects.all()
-    )
-    category = serializers.SlugRelatedField(
-        slug_field='slug',
-        queryset=Category.objects.all()
-    )
+    genre = CatalogSlugRelatedField(genre_catalog, many=True)
+    category = CatalogSlugRelatedField(category_catalog)
 
     class Meta:
         fields = (
@@ -99,6 +96,38 @@ class TitleWriteSerializer(serializers.ModelSerializer):
         )
         model = Title
 
+    def set_genres(self, title, genres, created=False):
+        # Строки связи пишутся одним INSERT, без запросов на каждый жанр.
+        through = Title.genre.through
+        new_ids = {genre.pk for genre in genres}
+        old_ids = set() if created else set(
+            through.objects.filter(title=title)
+            .values_list('genre_id', flat=True)
+        )
+        if old_ids - new_ids:
+            through.objects.filter(
+                title=title, genre_id__in=old_ids - new_ids
+            ).delete()
+        through.objects.bulk_create(
+            through(title=title, genre_id=genre_id)
+            for genre_id in new_ids - old_ids
+        )
+
+    @transaction.atomic
+    def create(self, validated_data):
+        genres = validated_data.pop('genre')
+        title = super().create(validated_data)
+        self.set_genres(title, genres, created=True)
+        return title
+
+    @transaction.atomic
+    def update(self, instance, validated_data):
+        genres = validated_data.pop('genre', None)
+        title = super().update(instance, validated_data)
+        if genres is not None:
+            self.set_genres(title, genres)
+        return title
+
 
 class ReviewCreateSerializer(serializers.ModelSerializer):
     author = SlugRelatedField(slug_field='username', read_only=True,
@@ -0,0 +1,153 @@
+"""Статистика SQL по отпечаткам запросов, как pg_stat_statements.
+
+При SQL_STATS каждое новое соединение получает постоянный execute
+wrapper, поэтому учитываются все запросы приложения без изменений
+в коде. Отпечаток — текст запроса без литералов и параметров.
+Снимки процессов складываются через METRICS_DIR, как и метрики.
+Строки SELECT считаются по мере выборки: у sqlite3 rowcount для них
+всегда -1.
+"""
+import re
+import threading
+import time
+from functools import lru_cache
+
+from django.conf import settings
+
+from .metrics import due, read_snapshots, write_snapshot
+
+ORDERS = ('total', 'calls', 'max', 'mean', 'rows')
+FETCHES = ('fetchone', 'fetchmany', 'fetchall')
+
+_STRING = re.compile(r"'(?:[^']|'')*'")
+_NUMBER = re.compile(r'(?<![\w."])-?\d+(?:\.\d+)?\b')
+_PARAM = re.compile(r'%s|\?')
+_IN = re.compile(r'\bIN\s*\(\s*\?(?:\s*,\s*\?)*\s*\)', re.IGNORECASE)
+_LIST = re.compile(r'\(\s*\?(?:\s*,\s*\?)+\s*\)')
+_VALUES = re.compile(r'(\((?:\?|\.\.\.)\))(?:\s*,\s*\((?:\?|\.\.\.)\))+')
+_SPACE = re.compile(r'\s+')
+
+
+@lru_cache(maxsize=4096)
+def fingerprint(sql):
+    """Нормализует SQL: литералы и списки параметров заменяются на ?."""
+    sql = _STRING.sub('?', sql)
+    sql = _PARAM.sub('?', sql)
+    sql = _NUMBER.sub('?', sql)
+    sql = _IN.sub('IN (...)', sql)
+    sql = _LIST.sub('(...)', sql)
+    sql = _VALUES.sub(r'\1, ...', sql)
+    return _SPACE.sub(' ', sql).strip()
+
+
+class SqlStats:
+    """Вызовы, суммарное и наибольшее время и строки по отпечаткам."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.stats = {}
+        self.flushed = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        key = fingerprint(sql)
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            cursor = context['cursor']
+            rows = getattr(cursor, 'rowcount', -1)
+            self.record(key, time.perf_counter() - started, max(rows, 0))
+            self.count_fetched(cursor, key if rows < 0 else None)
+
+    def count_fetched(self, cursor, key):
+        """Подменяет fetch* курсора, чтобы добавлять строки к key.
+
+        Подмена живёт до следующего execute на этом курсоре;
+        key=None — строки уже посчитаны по rowcount.
+        """
+        for name in FETCHES:
+            # Снимаем подмену прошлого запроса: дальше getattr
+            # найдёт исходный метод через CursorWrapper.__getattr__.
+            cursor.__dict__.pop(name, None)
+        if key is None:
+            return
+        for name in FETCHES:
+            setattr(cursor, name, self.counting(cursor, name, key))
+
+    def counting(self, cursor, name, key):
+        fetch = getattr(cursor, name)
+
+        def counted(*args, **kwargs):
+            result = fetch(*args, **kwargs)
+            if name == 'fetchone':
+                self.add_rows(key, result is not None)
+            else:
+                self.add_rows(key, len(result))
+            return result
+        return counted
+
+    def add_rows(self, key, rows):
+        with self.lock:
+            item = self.stats.get(key)
+            if item is not None:
+                item[3] += rows
+
+    def record(self, key, elapsed, rows):
+        with self.lock:
+            item = self.stats.get(key)
+            if item is None:
+                item = self.stats[key] = [0, 0.0, 0.0, 0]
+            item[0] += 1
+            item[1] += elapsed
+            item[2] = max(item[2], elapsed)
+            item[3] += rows
+        self.flush()
+
+    def snapshot(self):
+        with self.lock:
+            return {key: list(item) for key, item in self.stats.items()}
+
+    def flush(self, force=False):
+        if settings.METRICS_DIR and (force or due(self)):
+            write_snapshot('sqlstats', self.snapshot())
+
+    def merged(self, current=True):
+        """Статистика всех процессов; current — вместе с текущим."""
+        if not settings.METRICS_DIR:
+            return self.snapshot()
+        if current:
+            self.flush(force=True)
+        result = {}
+        for snapshot in read_snapshots('sqlstats'):
+            for key, (calls, total, longest, rows) in snapshot.items():
+                item = result.setdefault(key, [0, 0.0, 0.0, 0])
+                item[0] += calls
+                item[1] += total
+                item[2] = max(item[2], longest)
+                item[3] += rows
+        return result
+
+    def top(self, limit=20, order='total', current=True):
+        rows = [
+            {
+                'query': key,
+                'calls': calls,
+                'total': round(total * 1000, 3),
+                'mean': round(total / calls * 1000, 3),
+                'max': round(longest * 1000, 3),
+                'rows': rows,
+            }
+            for key, (calls, total, longest, rows)
+            in self.merged(current).items()
+        ]
+        rows.sort(key=lambda row: row[order], reverse=True)
+        return rows[:limit]
+
+
+sql_stats = SqlStats()
+
+
+def install(sender, connection, **kwargs):
+    """Получатель connection_created: подключает сбор к соединению."""
+    if settings.SQL_STATS and sql_stats not in connection.execute_wrappers:
+        connection.execute_wrappers.append(sql_stats)
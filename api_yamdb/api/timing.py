@@ -0,0 +1,173 @@
+import cProfile
+import os
+import random
+import re
+import time
+from contextlib import ExitStack, contextmanager, nullcontext
+
+from django.conf import settings
+from django.db import connections
+
+HEADER = 'HTTP_X_SERVER_TIMING'
+
+
+class Timings:
+    """Время этапов одного запроса для заголовка Server-Timing.
+
+    Сам объект служит execute wrapper'ом и суммирует время запросов
+    к БД. Время БД вычитается из остальных этапов, чтобы они
+    не пересекались.
+    """
+
+    def __init__(self, trusted, profile=False):
+        # Заголовок от клиента учитывается, только если клиент — админ.
+        self.trusted = trusted
+        # Профиль нужен, но снимается только для доверенного запроса.
+        self.profile = profile
+        self.profiler = None
+        self.started = time.perf_counter()
+        self.spans = {}
+        self.db = 0.0
+        self.queries = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.db += time.perf_counter() - started
+            self.queries += 1
+
+    def start_profile(self):
+        if self.profile and self.trusted and self.profiler is None:
+            self.profiler = cProfile.Profile()
+            self.profiler.enable()
+
+    def stop_profile(self):
+        if self.profiler is not None:
+            self.profiler.disable()
+
+    @contextmanager
+    def span(self, name):
+        started, db = time.perf_counter(), self.db
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - started - (self.db - db)
+            self.spans[name] = self.spans.get(name, 0.0) + elapsed
+
+    def header(self):
+        total = time.perf_counter() - self.started
+        items = [f'db;dur={self.db * 1000:.2f};desc="{self.queries} queries"']
+        items += [
+            f'{name};dur={seconds * 1000:.2f}'
+            for name, seconds in self.spans.items()
+        ]
+        items.append(f'total;dur={total * 1000:.2f}')
+        return ', '.join(items)
+
+
+class ServerTimingMiddleware:
+    """Добавляет Server-Timing при SERVER_TIMING или заголовке X-Server-Timing.
+
+    X-Server-Timing: profile дополнительно сохраняет профиль cProfile
+    в SERVER_TIMING_PROFILE_DIR, как и доля SERVER_TIMING_PROFILE_RATE
+    всех замеряемых запросов. Без SERVER_TIMING профилирование
+    начинается, только когда ServerTimingMixin узнал в клиенте админа.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        requested = request.META.get(HEADER)
+        if requested is None and not settings.SERVER_TIMING:
+            return self.get_response(request)
+
+        timings = Timings(trusted=settings.SERVER_TIMING,
+                          profile=self.sampled(requested))
+        request.server_timing = timings
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(timings))
+            stack.callback(timings.stop_profile)
+            timings.start_profile()
+            response = self.get_response(request)
+
+        if timings.trusted:
+            response['Server-Timing'] = timings.header()
+            if timings.profiler is not None:
+                self.dump(timings.profiler, request)
+        return response
+
+    def sampled(self, requested):
+        if not settings.SERVER_TIMING_PROFILE_DIR:
+            return False
+        if requested == 'profile':
+            return True
+        rate = settings.SERVER_TIMING_PROFILE_RATE
+        return bool(rate) and random.random() < rate
+
+    def dump(self, profiler, request):
+        directory = settings.SERVER_TIMING_PROFILE_DIR
+        os.makedirs(directory, exist_ok=True)
+        path = re.sub(r'\W+', '_', request.path).strip('_')
+        profiler.dump_stats(os.path.join(
+            directory, f'{time.time_ns()}-{request.method}-{path}.prof'
+        ))
+
+
+class ServerTimingMixin:
+    """Разбивает время APIView на аутентификацию, права, сериализацию
+    и рендеринг, если запрос замеряется ServerTimingMiddleware."""
+
+    def timed(self, name):
+        timings = getattr(self.request, 'server_timing', None)
+        if timings is None:
+            return nullcontext()
+        return timings.span(name)
+
+    def wrap(self, method, name):
+        def wrapper(*args, **kwargs):
+            with self.timed(name):
+                return method(*args, **kwargs)
+        return wrapper
+
+    def perform_authentication(self, request):
+        with self.timed('auth'):
+            super().perform_authentication(request)
+        timings = getattr(request, 'server_timing', None)
+        if timings is not None and not timings.trusted:
+            user = request.user
+            timings.trusted = user.is_authenticated and user.is_admin
+            timings.start_profile()
+
+    def check_permissions(self, request):
+        with self.timed('permissions'):
+            super().check_permissions(request)
+
+    def check_object_permissions(self, request, obj):
+        with self.timed('permissions'):
+            super().check_object_permissions(request, obj)
+
+    def get_serializer(self, *args, **kwargs):
+        serializer = super().get_serializer(*args, **kwargs)
+        if getattr(self.request, 'server_timing', None) is not None:
+            # Атрибут экземпляра перекрывает метод класса, так что
+            # замер не затрагивает другие запросы.
+            serializer.is_valid = self.wrap(serializer.is_valid, 'validate')
+            serializer.to_representation = self.wrap(
+                serializer.to_representation, 'serialize'
+            )
+        return serializer
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(
+            request, response, *args, **kwargs
+        )
+        if getattr(request, 'server_timing', None) is not None and hasattr(
+            response, 'render'
+        ):
+            with self.timed('render'):
+                response.render()
+        return response
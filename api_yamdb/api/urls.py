@@ -2,6 +2,8 @@ from django.urls import path, include
 from rest_framework import routers
 
 from .views import (
+    metrics,
+    sqlstats,
     signup,
     token,
     CommentViewSet,
@@ -30,5 +32,7 @@ router.register(
 urlpatterns = [
     path('v1/', include(router.urls)),
     path('v1/auth/signup/', signup, name='signup'),
-    path('v1/auth/token/', token, name='token')
+    path('v1/auth/token/', token, name='token'),
+    path('v1/metrics/', metrics, name='metrics'),
+    path('v1/sqlstats/', sqlstats, name='sqlstats'),
 ]
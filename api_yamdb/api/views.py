@@ -1,10 +1,10 @@
 from django.core.mail import send_mail
+from django.http import HttpResponse
 from django.shortcuts import get_object_or_404
 from django.contrib.auth import get_user_model
 from django_filters.rest_framework import DjangoFilterBackend
 from django.conf import settings
 from django.contrib.auth.tokens import default_token_generator
-from django.db.models import Avg
 from rest_framework import status, viewsets, filters, mixins
 from rest_framework.permissions import AllowAny, IsAuthenticated
 from rest_framework.generics import get_object_or_404
@@ -13,7 +13,10 @@ from rest_framework.decorators import api_view, permission_classes, action
 from rest_framework.response import Response
 from rest_framework_simplejwt.tokens import RefreshToken
 
+from reviews.catalog import category_catalog, genre_catalog
 from reviews.models import Category, Genre, Title
+from reviews.versions import (AUTHORS, REVIEWS, TITLES, USERS,
+                              title_version)
 
 from .serializers import (
     SignupSerializer,
@@ -32,9 +35,15 @@ from .permissions import (
     IsOwnerPermission,
     IsAdminPermission,
     IsModeratorPermission,
+    MetricsPermission,
     ReadOnlyPermission
 )
+from . import cards
+from .cache import VersionedCacheMixin
 from .filters import TitleFilter
+from .metrics import registry
+from .sqlstats import ORDERS, sql_stats
+from .timing import ServerTimingMixin
 
 User = get_user_model()
 
@@ -79,9 +88,38 @@ def token(request):
     return Response(response, status=status.HTTP_400_BAD_REQUEST)
 
 
-class UserViewSet(viewsets.ModelViewSet):
+@api_view(['GET'])
+@permission_classes([MetricsPermission])
+def metrics(request):
+    return HttpResponse(
+        registry.render(), content_type='text/plain; version=0.0.4'
+    )
+
+
+@api_view(['GET'])
+@permission_classes([IsAdminPermission])
+def sqlstats(request):
+    order = request.query_params.get('order', 'total')
+    limit = request.query_params.get('limit', '20')
+    if order not in ORDERS or not limit.isdigit():
+        response = {'order': list(ORDERS), 'limit': 'positive integer'}
+        return Response(response, status=status.HTTP_400_BAD_REQUEST)
+    return Response(sql_stats.top(int(limit), order))
+
+
+class UserViewSet(
+    VersionedCacheMixin,
+    ServerTimingMixin,
+    viewsets.ModelViewSet
+):
     queryset = User.objects.all()
     serializer_class = UserSerializer
+    # Пользователей видят только админы: ответы не кэшируются,
+    # а лишь получают ETag.
+    cache_versions = (USERS,)
+    cached_actions = ()
+    conditional_actions = ('list', 'retrieve', 'me')
+    personal_actions = ('me',)
 
     http_method_names = ['get', 'post', 'patch', 'delete']
 
@@ -109,13 +147,32 @@ class UserViewSet(viewsets.ModelViewSet):
         return Response(serializer.data)
 
 
+class CatalogListMixin:
+    catalog = None
+
+    def filter_queryset(self, queryset):
+        # Список без фильтров и поиска отдаётся из справочника в памяти.
+        params = self.request.query_params
+        lookups = (*self.filterset_fields, filters.SearchFilter.search_param)
+        if self.action == 'list' and not any(
+            name in params for name in lookups
+        ):
+            return self.catalog.all()
+        return super().filter_queryset(queryset)
+
+
 class CategoryViewSet(
+    VersionedCacheMixin,
+    ServerTimingMixin,
+    CatalogListMixin,
     mixins.CreateModelMixin,
     mixins.DestroyModelMixin,
     mixins.ListModelMixin,
     viewsets.GenericViewSet
 ):
     queryset = Category.objects.all()
+    catalog = category_catalog
+    cache_versions = (category_catalog.name,)
     serializer_class = CategorySerializer
     permission_classes = (ReadOnlyPermission | IsAdminPermission,)
     filter_backends = (DjangoFilterBackend, filters.SearchFilter)
@@ -125,12 +182,17 @@ class CategoryViewSet(
 
 
 class GenreViewSet(
+    VersionedCacheMixin,
+    ServerTimingMixin,
+    CatalogListMixin,
     mixins.CreateModelMixin,
     mixins.DestroyModelMixin,
     mixins.ListModelMixin,
     viewsets.GenericViewSet
 ):
     queryset = Genre.objects.all()
+    catalog = genre_catalog
+    cache_versions = (genre_catalog.name,)
     serializer_class = GenreSerializer
     permission_classes = (ReadOnlyPermission | IsAdminPermission,)
     filter_backends = (DjangoFilterBackend, filters.SearchFilter)
@@ -139,14 +201,23 @@ class GenreViewSet(
     lookup_field = 'slug'
 
 
-class TitleViewSet(viewsets.ModelViewSet):
-    queryset = Title.objects.all().annotate(rating=Avg('reviews__score'))
+class TitleViewSet(
+    VersionedCacheMixin,
+    ServerTimingMixin,
+    viewsets.ModelViewSet
+):
+    queryset = Title.objects.select_related(
+        'category'
+    ).prefetch_related('genre')
+    cache_versions = (TITLES, category_catalog.name, genre_catalog.name)
+    stale_while_revalidate = True
     permission_classes = (ReadOnlyPermission | IsAdminPermission,)
     filter_backends = (DjangoFilterBackend,)
     filterset_fields = (
         'category',
         'genre',
         'name',
+        'name_prefix',
         'year',
     )
     filterset_class = TitleFilter
@@ -156,8 +227,61 @@ class TitleViewSet(viewsets.ModelViewSet):
             return TitleReadSerializer
         return TitleWriteSerializer
 
+    @property
+    def use_cards(self):
+        """Ответ в JSON склеивается из готовых карточек."""
+        return (
+            settings.TITLE_CARDS
+            and self.action in ('list', 'retrieve')
+            and self.request.accepted_renderer.format == 'json'
+        )
 
-class ReviewViewSet(viewsets.ModelViewSet):
+    def get_queryset(self):
+        if self.use_cards:
+            return Title.objects.only('pk', 'card')
+        return super().get_queryset()
+
+    def list(self, request, *args, **kwargs):
+        if not self.use_cards:
+            return super().list(request, *args, **kwargs)
+        queryset = self.filter_queryset(self.get_queryset())
+        page = self.paginate_queryset(queryset)
+        # Этапы Server-Timing те же: достройка карточек и склейка.
+        with self.timed('serialize'):
+            items = cards.fill_cards(list(queryset) if page is None else page)
+        with self.timed('render'):
+            if page is None:
+                content = cards.join_cards(items)
+            else:
+                content = cards.render_page(
+                    self.get_paginated_response([]).data, items
+                )
+        return HttpResponse(content, content_type='application/json')
+
+    def retrieve(self, request, *args, **kwargs):
+        if not self.use_cards:
+            return super().retrieve(request, *args, **kwargs)
+        title = self.get_object()
+        with self.timed('serialize'):
+            content, = cards.fill_cards([title])
+        return HttpResponse(content, content_type='application/json')
+
+
+class TitleContentCacheMixin(VersionedCacheMixin):
+    """Отзывы и комментарии кэшируются по версии своего произведения,
+    поэтому запись под одним произведением не трогает другие."""
+
+    cache_versions = (REVIEWS, AUTHORS)
+
+    def get_cache_versions(self):
+        return (title_version(self.kwargs['title_id']), *self.cache_versions)
+
+
+class ReviewViewSet(
+    TitleContentCacheMixin,
+    ServerTimingMixin,
+    viewsets.ModelViewSet
+):
     serializer_class = ReviewSerializer
     permission_classes = (
         IsOwnerPermission | IsAdminPermission | IsModeratorPermission,
@@ -178,14 +302,18 @@ class ReviewViewSet(viewsets.ModelViewSet):
 
     def get_queryset(self):
         title = get_object_or_404(Title, id=self.kwargs['title_id'])
-        return title.reviews.all()
+        return title.reviews.select_related('author')
 
     def perform_create(self, serializer):
         title = get_object_or_404(Title, id=self.kwargs['title_id'])
         serializer.save(author=self.request.user, title=title)
 
 
-class CommentViewSet(viewsets.ModelViewSet):
+class CommentViewSet(
+    TitleContentCacheMixin,
+    ServerTimingMixin,
+    viewsets.ModelViewSet
+):
     serializer_class = CommentSerializer
     permission_classes = (
         IsOwnerPermission | IsAdminPermission | IsModeratorPermission,
@@ -200,7 +328,7 @@ class CommentViewSet(viewsets.ModelViewSet):
     def get_queryset(self):
         title = get_object_or_404(Title, id=self.kwargs['title_id'])
         review = get_object_or_404(title.reviews, id=self.kwargs['review_id'])
-        return review.comments.all()
+        return review.comments.select_related('author')
 
     def perform_create(self, serializer):
         title = get_object_or_404(Title, id=self.kwargs['title_id'])
@@ -29,12 +29,14 @@ INSTALLED_APPS = [
     'django.contrib.staticfiles',
     'rest_framework',
     'rest_framework_simplejwt',
-    'reviews',
-    'api',
+    'reviews.apps.ReviewsConfig',
+    'api.apps.ApiConfig',
     'django_filters',
 ]
 
 MIDDLEWARE = [
+    'api.metrics.MetricsMiddleware',
+    'api.timing.ServerTimingMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -122,7 +124,7 @@ REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [
         'rest_framework_simplejwt.authentication.JWTAuthentication',
     ],
-    'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
+    'DEFAULT_PAGINATION_CLASS': 'api.pagination.OptionalCountPagination',
     'PAGE_SIZE': 5,
 }
 
@@ -132,3 +134,75 @@ SIMPLE_JWT = {
 }
 
 EMAIL_ADMIN = 'admin@yamdb.blog'
+
+# Pagination: ?count=false drops COUNT(*) from a single response,
+# PAGINATION_COUNT=False drops it everywhere. A non-zero timeout caches
+# counts per filter set for that many seconds.
+PAGINATION_COUNT = os.getenv('PAGINATION_COUNT', 'true').lower() == 'true'
+PAGINATION_COUNT_CACHE_TIMEOUT = int(
+    os.getenv('PAGINATION_COUNT_CACHE_TIMEOUT', 0)
+)
+
+# Server-Timing: SERVER_TIMING=true adds the header to every response,
+# otherwise only admins get it by sending X-Server-Timing. A profile dir
+# turns on cProfile dumps for X-Server-Timing: profile and for the given
+# share of timed requests.
+SERVER_TIMING = os.getenv('SERVER_TIMING', 'false').lower() == 'true'
+SERVER_TIMING_PROFILE_DIR = os.getenv('SERVER_TIMING_PROFILE_DIR', '')
+SERVER_TIMING_PROFILE_RATE = float(
+    os.getenv('SERVER_TIMING_PROFILE_RATE', 0)
+)
+
+# Prometheus metrics at /api/v1/metrics/. With several worker processes
+# set METRICS_DIR: each process dumps its counters there at most once per
+# METRICS_FLUSH_INTERVAL seconds and the endpoint sums all dumps.
+METRICS = os.getenv('METRICS', 'true').lower() == 'true'
+METRICS_DIR = os.getenv('METRICS_DIR', '')
+METRICS_FLUSH_INTERVAL = float(os.getenv('METRICS_FLUSH_INTERVAL', 5))
+# Comma-separated addresses that read metrics without a token. They are
+# matched against REMOTE_ADDR, which behind a reverse proxy on the same
+# host is the proxy's own address, so the list is empty by default.
+METRICS_ALLOWED_IPS = [
+    ip for ip in os.getenv('METRICS_ALLOWED_IPS', '').split(',') if ip
+]
+
+# SQL statistics by query fingerprint, at /api/v1/sqlstats/ and in the
+# sqlstats command (the command reads the dumps in METRICS_DIR).
+SQL_STATS = os.getenv('SQL_STATS', 'false').lower() == 'true'
+
+# Cache backend: locmem inside one process, file to share the cache and
+# the data versions between worker processes on one host. The default
+# CACHE_DIR is inside the project and ignored by git.
+CACHE_BACKEND = os.getenv('CACHE_BACKEND', 'locmem')
+CACHE_DIR = os.getenv('CACHE_DIR', os.path.join(BASE_DIR, 'cache'))
+CACHES = {
+    'default': {
+        'BACKEND': {
+            'locmem': 'django.core.cache.backends.locmem.LocMemCache',
+            'file': 'django.core.cache.backends.filebased.FileBasedCache',
+        }[CACHE_BACKEND],
+        'LOCATION': CACHE_DIR if CACHE_BACKEND == 'file' else '',
+        'OPTIONS': {'MAX_ENTRIES': int(os.getenv('CACHE_MAX_ENTRIES', 3000))},
+    }
+}
+
+# ETag and Last-Modified from data versions, 304 for matching
+# If-None-Match and If-Modified-Since.
+CONDITIONAL_GET = os.getenv('CONDITIONAL_GET', 'true').lower() == 'true'
+
+# Title list and detail JSON assembled from stored title cards.
+TITLE_CARDS = os.getenv('TITLE_CARDS', 'true').lower() == 'true'
+
+# Cached title, category and genre reads. Writes bump data versions, so
+# the timeout only frees space taken by responses of old versions.
+RESPONSE_CACHE = os.getenv('RESPONSE_CACHE', 'true').lower() == 'true'
+RESPONSE_CACHE_TIMEOUT = int(os.getenv('RESPONSE_CACHE_TIMEOUT', 3600))
+# Title pages are served stale while one request rebuilds them. Rebuilds
+# are single per process, and per host when processes share a lock dir.
+RESPONSE_CACHE_LOCK_DIR = os.getenv(
+    'RESPONSE_CACHE_LOCK_DIR',
+    os.path.join(CACHE_DIR, 'locks') if CACHE_BACKEND == 'file' else ''
+)
+RESPONSE_CACHE_LOCK_TIMEOUT = float(
+    os.getenv('RESPONSE_CACHE_LOCK_TIMEOUT', 5)
+)
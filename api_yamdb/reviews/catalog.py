@@ -0,0 +1,67 @@
+"""Кэш справочников категорий и жанров в памяти процесса.
+
+Справочник хранит объекты по slug и перечитывается из БД целиком,
+только когда меняется его версия в общем кэше (см. versions.py).
+"""
+import threading
+
+from .models import Category, Genre
+from .versions import bump_version, get_version
+
+
+class Catalog:
+    def __init__(self, model):
+        self.model = model
+        self.name = f'catalog:{model._meta.label_lower}'
+        self._version = None
+        self._items = {}
+        self._lock = threading.Lock()
+        # Счётчики для метрик, без блокировки: точность тут не важна.
+        self.hits = self.misses = 0
+
+    def __deepcopy__(self, memo):
+        # Поля сериализаторов копируются на каждый запрос,
+        # а справочник должен оставаться общим для процесса.
+        return self
+
+    def _load(self):
+        version = get_version(self.name)
+        if version == self._version:
+            self.hits += 1
+        else:
+            self.misses += 1
+            with self._lock:
+                if version != self._version:
+                    self._items = {
+                        obj.slug: obj for obj in self.model.objects.all()
+                    }
+                    self._version = version
+        return self._items
+
+    def all(self):
+        return list(self._load().values())
+
+    def get(self, slug):
+        return self._load().get(slug)
+
+    def resolve(self, slugs):
+        """Возвращает найденные объекты и список неизвестных slug."""
+        items = self._load()
+        found, missing = [], []
+        for slug in dict.fromkeys(slugs):
+            obj = items.get(slug)
+            if obj is None:
+                missing.append(slug)
+            else:
+                found.append(obj)
+        return found, missing
+
+    def choices(self):
+        return [(slug, obj.name) for slug, obj in self._load().items()]
+
+    def invalidate(self):
+        bump_version(self.name)
+
+
+category_catalog = Catalog(Category)
+genre_catalog = Catalog(Genre)
@@ -0,0 +1,63 @@
+import unicodedata
+
+from django.db import models
+
+# Наибольшая длина normalize() от одного символа: U+FDFA даёт 18.
+MAX_EXPANSION = 18
+
+
+def normalize(value):
+    """Приводит строку к виду для поиска без учёта регистра.
+
+    casefold() работает для любых алфавитов, в отличие от LIKE
+    в SQLite, который сравнивает без учёта регистра только ASCII.
+    """
+    return unicodedata.normalize('NFKC', value).casefold()
+
+
+class NormalizedCharField(models.CharField):
+    """Нормализованная копия поля source, заполняется при сохранении.
+
+    pre_save вызывается и в save(), и в bulk_create, но не в
+    bulk_update и QuerySet.update: там поле нужно обновлять явно.
+    """
+
+    def __init__(self, *args, source=None, **kwargs):
+        self.source = source
+        kwargs.setdefault('editable', False)
+        super().__init__(*args, **kwargs)
+
+    def deconstruct(self):
+        name, path, args, kwargs = super().deconstruct()
+        kwargs['source'] = self.source
+        if kwargs.get('editable') is False:
+            del kwargs['editable']
+        return name, path, args, kwargs
+
+    def pre_save(self, model_instance, add):
+        value = normalize(getattr(model_instance, self.source) or '')
+        setattr(model_instance, self.attname, value)
+        return value
+
+
+class RenderedField(models.TextField):
+    """Готовое представление записи, его пишут обработчики изменений.
+
+    Пустая строка значит, что представление ещё не построено.
+    """
+
+    def __init__(self, *args, **kwargs):
+        kwargs.setdefault('editable', False)
+        kwargs.setdefault('default', '')
+        super().__init__(*args, **kwargs)
+
+    def deconstruct(self):
+        name, path, args, kwargs = super().deconstruct()
+        if kwargs.get('editable') is False:
+            del kwargs['editable']
+        return name, path, args, kwargs
+
+
+def is_derived(field):
+    """Поле вычисляется из других данных, а не вводится."""
+    return isinstance(field, (NormalizedCharField, RenderedField))
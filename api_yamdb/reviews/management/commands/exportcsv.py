@@ -0,0 +1,121 @@
+import csv
+import json
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.apps import apps
+from django.core.management.base import BaseCommand, CommandError
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import connections
+
+from reviews.fields import is_derived
+from reviews.management.loader import csv_name
+
+APP_LABELS = ('users', 'reviews')
+
+
+class Command(BaseCommand):
+    help = 'Export models to CSV or NDJSON files'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--model_name', type=str, help="model name")
+        parser.add_argument(
+            '--all', action='store_true',
+            help="export every model of the users and reviews apps"
+        )
+        parser.add_argument(
+            '--output', type=str, default='.', help="output directory"
+        )
+        parser.add_argument(
+            '--format', choices=('csv', 'ndjson'), default='csv'
+        )
+        parser.add_argument(
+            '--chunk-size', type=int, default=2000,
+            help="rows fetched from the database at once"
+        )
+        parser.add_argument(
+            '--jobs', type=int, default=1, help="tables exported at once"
+        )
+
+    def get_models(self, options):
+        if options['all']:
+            return [
+                model for label in APP_LABELS
+                for model in apps.get_app_config(label).get_models(
+                    include_auto_created=True
+                )
+            ]
+        try:
+            return [apps.get_model(options['model_name'])]
+        except Exception as err:
+            raise CommandError(str(err))
+
+    def write_csv(self, file, columns, rows):
+        writer = csv.writer(file)
+        writer.writerow(columns)
+        for row in rows:
+            writer.writerow('' if value is None else value for value in row)
+            yield
+
+    def write_ndjson(self, file, columns, rows):
+        for row in rows:
+            file.write(json.dumps(
+                dict(zip(columns, row)), cls=DjangoJSONEncoder,
+                ensure_ascii=False
+            ))
+            file.write('\n')
+            yield
+
+    def export(self, model):
+        started = time.monotonic()
+        # Вычисляемые поля importcsv заполнит сам.
+        columns = [
+            field.attname for field in model._meta.concrete_fields
+            if not is_derived(field)
+        ]
+        # iterator() читает пачками, на PostgreSQL через серверный курсор.
+        rows = model._default_manager.order_by('pk').values_list(
+            *columns
+        ).iterator(chunk_size=self.chunk_size)
+        path = os.path.join(self.output, f'{csv_name(model)}.{self.format}')
+        temp = f'{path}.tmp'
+        write = getattr(self, f'write_{self.format}')
+        total = 0
+        with open(temp, 'w', encoding='utf-8', newline='') as file:
+            for _ in write(file, columns, rows):
+                total += 1
+        os.replace(temp, path)
+        return path, total, time.monotonic() - started
+
+    def export_in_thread(self, model):
+        try:
+            return self.export(model)
+        finally:
+            # Поток открывает своё соединение с БД, его нужно закрыть.
+            connections.close_all()
+
+    def handle(self, *args, **options):
+        if not options['all'] and not options['model_name']:
+            raise CommandError('Pass --model_name or --all')
+        if options['chunk_size'] < 1:
+            raise CommandError('--chunk-size must be positive')
+        self.output = options['output']
+        self.format = options['format']
+        self.chunk_size = options['chunk_size']
+        os.makedirs(self.output, exist_ok=True)
+        models = self.get_models(options)
+
+        if options['jobs'] > 1:
+            with ThreadPoolExecutor(max_workers=options['jobs']) as executor:
+                results = list(executor.map(self.export_in_thread, models))
+        else:
+            results = [self.export(model) for model in models]
+
+        if options['verbosity']:
+            for path, total, elapsed in results:
+                rate = total / elapsed if elapsed else total
+                self.stdout.write(
+                    f'{path}: {total} rows in {elapsed:.2f}s '
+                    f'({rate:.0f} rows/sec)'
+                )
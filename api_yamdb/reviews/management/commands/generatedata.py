@@ -0,0 +1,262 @@
+import math
+import random
+import time
+from itertools import accumulate, islice
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.db.models import Max
+
+from reviews.models import Category, Comment, Genre, Review, Title
+from reviews.signals import bulk_imported
+
+User = get_user_model()
+
+WORDS = (
+    'фильм', 'книга', 'сюжет', 'герой', 'финал', 'музыка', 'актёр',
+    'сцена', 'история', 'автор', 'отлично', 'скучно', 'сильно', 'смешно',
+    'грустно', 'неожиданно', 'красиво', 'долго', 'стоит', 'посмотреть',
+)
+# Сколько пар произведение—автор помнит generatedata; память
+# ограничена, а повторы сверх этого отбрасывает БД.
+SEEN_PAIRS = 1000000
+# Столько id проверяется одним запросом.
+EXISTS_BATCH = 500
+
+
+class Command(BaseCommand):
+    help = 'Generate a large synthetic dataset for load testing'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=1000)
+        parser.add_argument('--categories', type=int, default=10)
+        parser.add_argument('--genres', type=int, default=30)
+        parser.add_argument('--titles', type=int, default=10000)
+        parser.add_argument(
+            '--genres-per-title', type=int, default=3,
+            help="maximum number of genres of a title"
+        )
+        parser.add_argument('--reviews', type=int, default=100000)
+        parser.add_argument('--comments', type=int, default=100000)
+        parser.add_argument(
+            '--skew', type=float, default=1.1,
+            help="Zipf exponent for hot titles and prolific users"
+        )
+        parser.add_argument('--seed', type=int, default=42)
+        parser.add_argument('--batch-size', type=int, default=5000)
+
+    def next_id(self, model):
+        return (model.objects.aggregate(last=Max('pk'))['last'] or 0) + 1
+
+    def zipf(self, ids):
+        """Выбирает id с весом 1/rank**skew, ранги перемешаны."""
+        ids = list(ids)
+        self.rng.shuffle(ids)
+        weights = accumulate(
+            1 / rank ** self.skew for rank in range(1, len(ids) + 1)
+        )
+        weights = list(weights)
+
+        def sample(k):
+            return self.rng.choices(ids, cum_weights=weights, k=k)
+        return sample
+
+    def zipf_range(self, ids):
+        """Как zipf, но по range id и без списков длиной в range.
+
+        Ранг получается обращением непрерывного степенного закона,
+        а ранги перемешиваются перестановкой (a * rank + b) % n.
+        """
+        first, n, skew = ids.start, len(ids), self.skew
+        a = 1
+        if n > 1:
+            a = self.rng.randrange(1, n)
+            while math.gcd(a, n) != 1:
+                a = self.rng.randrange(1, n)
+        b = self.rng.randrange(n)
+
+        def rank(u):
+            if skew == 1:
+                x = (n + 1) ** u
+            else:
+                x = (1 + u * ((n + 1) ** (1 - skew) - 1)) ** (1 / (1 - skew))
+            return min(int(x), n) - 1
+
+        def sample(k):
+            return [
+                first + (a * rank(self.rng.random()) + b) % n
+                for _ in range(k)
+            ]
+        return sample
+
+    def text(self, words):
+        return ' '.join(self.rng.choices(WORDS, k=words)).capitalize()
+
+    def chunks(self, objs):
+        while True:
+            batch = list(islice(objs, self.batch_size))
+            if not batch:
+                return
+            yield batch
+
+    def save(self, model, batches, ignore_conflicts=False):
+        """Пишет пачки; с ignore_conflicts конфликтующие строки отбрасываются.
+
+        Следующая пачка запрашивается после записи предыдущей.
+        """
+        started = time.monotonic()
+        before = model.objects.count() if ignore_conflicts else 0
+        total = 0
+        for batch in batches:
+            with transaction.atomic():
+                model.objects.bulk_create(
+                    batch, ignore_conflicts=ignore_conflicts
+                )
+            total += len(batch)
+        if ignore_conflicts:
+            total = model.objects.count() - before
+        elapsed = time.monotonic() - started
+        if self.verbosity:
+            rate = total / elapsed if elapsed else total
+            self.stdout.write(
+                f'{model._meta.label}: {total} rows in {elapsed:.2f}s '
+                f'({rate:.0f} rows/sec)'
+            )
+        bulk_imported.send(sender=model)
+
+    def generate_users(self, count):
+        first = self.next_id(User)
+        self.save(User, self.chunks(
+            User(id=pk, username=f'user{pk}', email=f'user{pk}@yamdb.fake',
+                 password='!', role='user')
+            for pk in range(first, first + count)
+        ))
+        return range(first, first + count)
+
+    def generate_catalog(self, model, count):
+        first = self.next_id(model)
+        self.save(model, self.chunks(
+            model(id=pk, name=f'{model.__name__} {pk}',
+                  slug=f'{model._meta.model_name}-{pk}')
+            for pk in range(first, first + count)
+        ))
+        return range(first, first + count)
+
+    def generate_titles(self, count, categories, genres, genres_per_title):
+        first = self.next_id(Title)
+        ids = range(first, first + count)
+        self.save(Title, self.chunks(
+            Title(id=pk, name=f'Title {pk}', year=self.rng.randint(1900, 2021),
+                  description=self.text(12),
+                  category_id=self.rng.choice(categories))
+            for pk in ids
+        ))
+        through = Title.genre.through
+        self.save(through, self.chunks(
+            through(title_id=pk, genre_id=genre_id)
+            for pk in ids
+            for genre_id in self.rng.sample(
+                genres, self.rng.randint(1, genres_per_title)
+            )
+        ))
+        return ids
+
+    def review_batches(self, count, titles, users, first):
+        """Пачки отзывов на случайные пары произведение—автор.
+
+        Повторы отбрасывает уникальное ограничение при записи,
+        а недостающие отзывы добираются следующими пачками. До SEEN_PAIRS
+        пар помнится, чтобы не строить заведомые повторы.
+        """
+        pick_title, pick_user = self.zipf(titles), self.zipf(users)
+        created = Review.objects.filter(pk__gte=first)
+        seen = set()
+        # При сильном перекосе горячие пары быстро заканчиваются,
+        # поэтому число попыток ограничено.
+        attempts, limit, missing, pk = 0, count * 20, count, first
+        while missing and attempts < limit:
+            if len(seen) >= SEEN_PAIRS:
+                seen.clear()
+            pairs = []
+            for pair in zip(pick_title(self.batch_size),
+                            pick_user(self.batch_size)):
+                attempts += 1
+                if pair in seen:
+                    continue
+                seen.add(pair)
+                pairs.append(pair)
+                if len(pairs) == missing:
+                    break
+            yield [
+                Review(id=pk, title_id=title_id, author_id=author_id,
+                       score=self.rng.randint(1, 10), text=self.text(20))
+                for pk, (title_id, author_id) in enumerate(pairs, pk)
+            ]
+            pk += len(pairs)
+            missing = count - created.count()
+
+    def generate_reviews(self, count, titles, users):
+        first = self.next_id(Review)
+        self.save(Review, self.review_batches(count, titles, users, first),
+                  ignore_conflicts=True)
+        # Отброшенные повторы оставляют в диапазоне пропуски.
+        return range(first, self.next_id(Review))
+
+    def stored_reviews(self, ids):
+        ids = sorted(set(ids))
+        stored = set()
+        for start in range(0, len(ids), EXISTS_BATCH):
+            stored.update(Review.objects.filter(
+                pk__in=ids[start:start + EXISTS_BATCH]
+            ).values_list('pk', flat=True))
+        return stored
+
+    def comment_pairs(self, count, reviews, users):
+        pick_review, pick_user = self.zipf_range(reviews), self.zipf(users)
+        for start in range(0, count, self.batch_size):
+            size = min(self.batch_size, count - start)
+            review_ids = []
+            while len(review_ids) < size:
+                drawn = pick_review(size - len(review_ids))
+                # Ранг, попавший в пропуск, тянется заново.
+                stored = self.stored_reviews(drawn)
+                review_ids += [pk for pk in drawn if pk in stored]
+            yield from zip(review_ids, pick_user(size))
+
+    def generate_comments(self, count, reviews, users):
+        self.save(Comment, self.chunks(
+            Comment(review_id=review_id, author_id=author_id,
+                    text=self.text(8))
+            for review_id, author_id in self.comment_pairs(
+                count, reviews, users
+            )
+        ))
+
+    def handle(self, *args, **options):
+        if min(options['users'], options['categories'], options['genres'],
+               options['titles'], options['genres_per_title']) < 1:
+            raise CommandError(
+                'users, categories, genres, titles and genres per title '
+                'must be positive'
+            )
+        self.rng = random.Random(options['seed'])
+        self.skew = options['skew']
+        self.batch_size = options['batch_size']
+        self.verbosity = options['verbosity']
+        started = time.monotonic()
+
+        users = self.generate_users(options['users'])
+        categories = self.generate_catalog(Category, options['categories'])
+        genres = self.generate_catalog(Genre, options['genres'])
+        titles = self.generate_titles(
+            options['titles'], categories, genres,
+            min(options['genres_per_title'], options['genres'])
+        )
+        reviews = self.generate_reviews(options['reviews'], titles, users)
+        if reviews:
+            self.generate_comments(options['comments'], reviews, users)
+
+        self.stdout.write(
+            f'Dataset generated in {time.monotonic() - started:.2f}s'
+        )
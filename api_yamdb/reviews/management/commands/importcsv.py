@@ -1,8 +1,7 @@
-import csv
-
 from django.core.management.base import BaseCommand, CommandError
 from django.apps import apps
-from django.db.utils import IntegrityError
+
+from reviews.management.loader import Checkpoint, CsvLoader
 
 
 class Command(BaseCommand):
@@ -11,33 +10,51 @@ class Command(BaseCommand):
     def add_arguments(self, parser):
         parser.add_argument('--path', type=str, help="file path")
         parser.add_argument('--model_name', type=str, help="model name")
+        parser.add_argument(
+            '--batch-size', type=int, default=1000,
+            help="rows per bulk insert and transaction"
+        )
+        parser.add_argument(
+            '--checkpoint', type=str,
+            help="file with the last committed offset, to resume a run"
+        )
+        parser.add_argument(
+            '--incremental', action='store_true',
+            help="insert new rows, update changed ones, skip the rest"
+        )
 
     def handle(self, *args, **options):
         # А зачем портянкой трейсбэка пользователей пугать,
         # а так всё культурно, прога падает и больше не выполняется
         # а мы видим ошибку
-        file_path = options['path']
-
         try:
             model = apps.get_model(options['model_name'])
         except Exception as err:
             raise CommandError(str(err))
 
-        try:
-            file = open(file_path, 'r')
-        except IOError as err:
-            raise CommandError(str(err))
-
-        reader = csv.reader(file, delimiter=',')
-        header = reader.__next__()
-        for row in reader:
-            data = {key: value for key, value in zip(header, row)}
-            try:
-                model.objects.create(**data)
-            except IntegrityError as err:
-                line = ', '.join(row)
-                raise CommandError(f'{err}, \"{line}\"')
-            except Exception as err:
-                raise CommandError(str(err))
-
-        file.close()
+        if options['batch_size'] < 1:
+            raise CommandError('--batch-size must be positive')
+
+        checkpoint = None
+        if options['checkpoint']:
+            checkpoint = Checkpoint(options['checkpoint'])
+        loader = CsvLoader(
+            model,
+            options['path'],
+            batch_size=options['batch_size'],
+            stdout=self.stdout if options['verbosity'] else None,
+            checkpoint=checkpoint,
+            incremental=options['incremental'],
+        )
+        total, elapsed = loader.load()
+        if checkpoint and not checkpoint.state.get('offsets'):
+            checkpoint.remove()
+        if options['verbosity']:
+            rate = total / elapsed if elapsed else total
+            stats = ', '.join(
+                f'{name} {count}' for name, count in loader.stats.items()
+            )
+            self.stdout.write(
+                f'Imported {total} rows into {model._meta.label} '
+                f'in {elapsed:.2f}s ({rate:.0f} rows/sec): {stats}'
+            )
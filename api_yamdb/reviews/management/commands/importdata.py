@@ -0,0 +1,137 @@
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.apps import apps
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, connections
+
+from reviews.management.loader import (Checkpoint, CsvLoader, csv_names,
+                                       dependency_levels)
+
+APP_LABELS = ('users', 'reviews')
+STATE_FILE = '.importdata.json'
+
+
+class Command(BaseCommand):
+    help = 'Import every CSV file of a directory in foreign key order'
+
+    def add_arguments(self, parser):
+        parser.add_argument('directory', type=str, help="directory with CSV")
+        parser.add_argument(
+            '--batch-size', type=int, default=1000,
+            help="rows per bulk insert and transaction"
+        )
+        parser.add_argument(
+            '--jobs', type=int, default=4,
+            help="files loaded at once (always 1 on SQLite)"
+        )
+        parser.add_argument(
+            '--state', type=str,
+            help=f"progress file, {STATE_FILE} in the directory by default"
+        )
+        parser.add_argument(
+            '--restart', action='store_true',
+            help="ignore progress of a previous run"
+        )
+        parser.add_argument(
+            '--incremental', action='store_true',
+            help="insert new rows, update changed ones, skip the rest"
+        )
+
+    def find_files(self, directory):
+        models = {}
+        for label in APP_LABELS:
+            config = apps.get_app_config(label)
+            for model in config.get_models(include_auto_created=True):
+                for name in csv_names(model):
+                    models[f'{name}.csv'] = model
+        files = {}
+        for name in sorted(os.listdir(directory)):
+            if not name.endswith('.csv'):
+                continue
+            if name not in models:
+                self.stderr.write(f'Skipping {name}: no matching model')
+                continue
+            files[models[name]] = os.path.join(directory, name)
+        return files
+
+    def record(self, model, files, result):
+        total, elapsed = result
+        with self.checkpoint.lock:
+            self.checkpoint.state['files'][model._meta.label] = {
+                'path': files[model], 'rows': total,
+                'seconds': round(elapsed, 3),
+            }
+            self.checkpoint.write()
+
+    def load_file(self, model, path):
+        loader = CsvLoader(model, path, batch_size=self.batch_size,
+                           stdout=self.stdout if self.verbosity else None,
+                           checkpoint=self.checkpoint,
+                           incremental=self.incremental)
+        return loader.load()
+
+    def load_file_in_thread(self, model, path):
+        try:
+            return self.load_file(model, path)
+        finally:
+            # Поток открывает своё соединение с БД, его нужно закрыть.
+            connections.close_all()
+
+    def load_level(self, models, files, jobs):
+        """Загружает независимые файлы, отдавая результат по готовности."""
+        if jobs == 1:
+            for model in models:
+                yield model, self.load_file(model, files[model])
+            return
+        with ThreadPoolExecutor(max_workers=jobs) as executor:
+            futures = {
+                model: executor.submit(
+                    self.load_file_in_thread, model, files[model]
+                )
+                for model in models
+            }
+        errors = []
+        for model, future in futures.items():
+            if future.exception() is None:
+                yield model, future.result()
+            else:
+                errors.append(future.exception())
+        if errors:
+            raise errors[0]
+
+    def handle(self, *args, **options):
+        directory = options['directory']
+        if not os.path.isdir(directory):
+            raise CommandError(f'{directory} is not a directory')
+        if options['batch_size'] < 1:
+            raise CommandError('--batch-size must be positive')
+        self.verbosity = options['verbosity']
+        self.batch_size = options['batch_size']
+        self.incremental = options['incremental']
+        jobs = max(options['jobs'], 1)
+        if connection.vendor == 'sqlite':
+            # SQLite допускает только одного пишущего.
+            jobs = 1
+
+        state_path = options['state'] or os.path.join(directory, STATE_FILE)
+        self.checkpoint = Checkpoint(state_path, options['restart'])
+        done = self.checkpoint.state.setdefault('files', {})
+        files = self.find_files(directory)
+        started = time.monotonic()
+
+        for level in dependency_levels(files):
+            pending = [
+                model for model in level
+                if model._meta.label not in done
+            ]
+            for model, result in self.load_level(pending, files, jobs):
+                self.record(model, files, result)
+
+        self.checkpoint.remove()
+        total = sum(item['rows'] for item in done.values())
+        self.stdout.write(
+            f'Imported {total} rows from {len(files)} files '
+            f'in {time.monotonic() - started:.2f}s'
+        )
@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+
+from reviews.models import Title
+from reviews.signals import titles_changed
+
+
+class Command(BaseCommand):
+    help = 'Recalculate stored title ratings from reviews'
+
+    def handle(self, *args, **options):
+        updated = Title.objects.all().refresh_rating()
+        titles_changed.send(sender=Title, title_ids=None)
+        self.stdout.write(f'Ratings rebuilt for {updated} titles')
@@ -0,0 +1,317 @@
+import csv
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import Counter, deque
+from itertools import islice
+
+from django.core.management.base import CommandError
+from django.db import connection, transaction
+from django.db.utils import IntegrityError
+
+from reviews.fields import is_derived
+from reviews.signals import bulk_imported
+
+
+class Checkpoint:
+    """JSON-файл с прогрессом загрузки.
+
+    Для каждого файла хранит число строк, уже зафиксированных в БД,
+    чтобы прерванная загрузка продолжилась со следующей пачки.
+    """
+
+    def __init__(self, path, restart=False):
+        self.path = path
+        self.lock = threading.Lock()
+        self.state = {}
+        if not restart and os.path.exists(path):
+            with open(path, encoding='utf-8') as file:
+                self.state = json.load(file)
+
+    def offset(self, key):
+        return self.state.get('offsets', {}).get(key, 0)
+
+    def commit(self, key, offset):
+        with self.lock:
+            self.state.setdefault('offsets', {})[key] = offset
+            self.write()
+
+    def clear(self, key):
+        with self.lock:
+            self.state.get('offsets', {}).pop(key, None)
+            self.write()
+
+    def write(self):
+        temp = f'{self.path}.tmp'
+        with open(temp, 'w', encoding='utf-8') as file:
+            json.dump(self.state, file, indent=2)
+        os.replace(temp, self.path)
+
+    def remove(self):
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+
+class CsvLoader:
+    """Потоковая загрузка CSV в модель пачками через bulk_create.
+
+    В памяти держится только текущая пачка, каждая пачка пишется
+    в своей транзакции.
+    """
+
+    interval = 1.0
+
+    def __init__(self, model, path, batch_size=1000, stdout=None,
+                 checkpoint=None, incremental=False):
+        self.model = model
+        self.path = path
+        self.batch_size = batch_size
+        self.stdout = stdout
+        self.checkpoint = checkpoint
+        self.incremental = incremental
+        self.key = f'{model._meta.label}:{os.path.basename(path)}'
+        self.reported = 0.0
+        self.stats = Counter()
+
+    def open(self):
+        try:
+            return open(self.path, 'r', encoding='utf-8', newline='')
+        except IOError as err:
+            raise CommandError(str(err))
+
+    def prepare(self, header):
+        """Сопоставляет колонки полям и загружает ключи связанных таблиц.
+
+        Колонка внешнего ключа может называться как поле (author)
+        или как его attname (author_id). Существующие ключи каждой
+        связанной таблицы читаются одним запросом на файл.
+        """
+        fields = {}
+        for field in self.model._meta.concrete_fields:
+            fields[field.name] = fields[field.attname] = field
+        unknown = [column for column in header if column not in fields]
+        if unknown:
+            raise CommandError(
+                f'Unknown columns for {self.model._meta.label}: '
+                + ', '.join(unknown)
+            )
+        self.fields = [fields[column] for column in header]
+        pk = self.model._meta.pk
+        if self.incremental and pk not in self.fields:
+            raise CommandError(
+                f'Incremental import needs the {pk.attname} column'
+            )
+        # auto_now_add и auto_now заполняются самой моделью,
+        # поэтому в сравнении и обновлении не участвуют.
+        self.compared = [
+            field for field in self.fields if field is not pk
+            and not getattr(field, 'auto_now', False)
+            and not getattr(field, 'auto_now_add', False)
+        ]
+        # Поля, вычисляемые из других в pre_save (NormalizedCharField):
+        # bulk_update их не пересчитывает, это делает save_batch.
+        self.derived = [
+            field for field in self.model._meta.concrete_fields
+            if is_derived(field)
+        ]
+        self.references = {
+            field.attname: set(
+                field.related_model._default_manager.values_list(
+                    field.target_field.attname, flat=True
+                ).iterator()
+            )
+            for field in self.fields if field.is_relation
+        }
+
+    def build(self, row):
+        data = {}
+        for field, value in zip(self.fields, row):
+            if value == '' and field.null:
+                value = None
+            elif field.is_relation:
+                value = field.target_field.to_python(value)
+                if value not in self.references[field.attname]:
+                    raise CommandError(
+                        f'{field.related_model._meta.label} {value} '
+                        f'does not exist'
+                    )
+            else:
+                value = field.to_python(value)
+            data[field.attname] = value
+        return self.model(**data)
+
+    def digest(self, values):
+        normalized = [
+            field.to_python(value)
+            for field, value in zip(self.compared, values)
+        ]
+        return hashlib.sha1(repr(normalized).encode()).digest()
+
+    def stored_digests(self, pks):
+        attnames = [field.attname for field in self.compared]
+        size = connection.ops.bulk_batch_size(['pk'], pks)
+        digests = {}
+        for start in range(0, len(pks), size):
+            rows = self.model.objects.filter(
+                pk__in=pks[start:start + size]
+            ).values_list('pk', *attnames)
+            for pk, *values in rows:
+                digests[pk] = self.digest(values)
+        return digests
+
+    def split_changes(self, rows, objs):
+        """Делит пачку на новые и изменённые строки, остальные пропускает."""
+        stored = self.stored_digests([obj.pk for obj in objs])
+        created, updated = [], []
+        for row, obj in zip(rows, objs):
+            digest = stored.get(obj.pk)
+            if digest is None:
+                created.append((row, obj))
+            elif digest != self.digest(
+                getattr(obj, field.attname) for field in self.compared
+            ):
+                updated.append(obj)
+        self.stats['unchanged'] += len(objs) - len(created) - len(updated)
+        return created, updated
+
+    def build_batch(self, rows):
+        objs = []
+        for row in rows:
+            try:
+                objs.append(self.build(row))
+            except Exception as err:
+                line = ', '.join(row)
+                raise CommandError(f'{err}, \"{line}\"')
+        return objs
+
+    def find_failed_row(self, rows, objs):
+        # Пачка не записалась: ищем строку с ошибкой, чтобы показать её.
+        with transaction.atomic():
+            for row, obj in zip(rows, objs):
+                try:
+                    with transaction.atomic():
+                        self.model.objects.bulk_create([obj])
+                except IntegrityError as err:
+                    line = ', '.join(row)
+                    raise CommandError(f'{err}, \"{line}\"')
+
+    def update(self, objs):
+        for obj in objs:
+            for field in self.derived:
+                field.pre_save(obj, False)
+        names = dict.fromkeys(
+            field.name for field in (*self.compared, *self.derived)
+        )
+        self.model.objects.bulk_update(objs, list(names))
+
+    def save_batch(self, rows):
+        objs = self.build_batch(rows)
+        updated = []
+        if self.incremental:
+            created, updated = self.split_changes(rows, objs)
+            rows = [row for row, _ in created]
+            objs = [obj for _, obj in created]
+        try:
+            with transaction.atomic():
+                self.model.objects.bulk_create(objs)
+                if updated:
+                    self.update(updated)
+        except IntegrityError as err:
+            self.find_failed_row(rows, objs)
+            raise CommandError(str(err))
+        except Exception as err:
+            raise CommandError(str(err))
+        self.stats['created'] += len(objs)
+        self.stats['updated'] += len(updated)
+
+    def report(self, total, started):
+        now = time.monotonic()
+        if self.stdout is None or now - self.reported < self.interval:
+            return
+        self.reported = now
+        elapsed = now - started
+        rate = total / elapsed if elapsed else total
+        self.stdout.write(
+            f'{self.model._meta.label}: {total} rows, '
+            f'{rate:.0f} rows/sec'
+        )
+
+    def load(self):
+        started = self.reported = time.monotonic()
+        offset = self.checkpoint.offset(self.key) if self.checkpoint else 0
+        total = 0
+        try:
+            with self.open() as file:
+                reader = csv.reader(file, delimiter=',')
+                self.prepare(next(reader))
+                # Строки до контрольной точки уже в БД: только читаем их.
+                deque(islice(reader, offset), maxlen=0)
+                while True:
+                    rows = list(islice(reader, self.batch_size))
+                    if not rows:
+                        break
+                    self.save_batch(rows)
+                    total += len(rows)
+                    if self.checkpoint:
+                        self.checkpoint.commit(self.key, offset + total)
+                    self.report(total, started)
+        finally:
+            # Пачки до ошибки уже зафиксированы: кэши и рейтинги
+            # должны их увидеть, даже если файл загружен не целиком.
+            if total:
+                bulk_imported.send(sender=self.model)
+        if self.checkpoint:
+            self.checkpoint.clear(self.key)
+        return total, time.monotonic() - started
+
+
+def _through_names(model):
+    return [
+        field.related_model._meta.model_name
+        for field in model._meta.fields if field.is_relation
+    ]
+
+
+def csv_name(model):
+    """Основное имя файла модели, в нём же пишет exportcsv."""
+    if model._meta.auto_created:
+        source, target = _through_names(model)
+        return f'{target}_{source}'
+    return model._meta.model_name
+
+
+def csv_names(model):
+    """Имена CSV-файлов, которые загружаются в модель."""
+    meta = model._meta
+    if meta.auto_created:
+        source, target = _through_names(model)
+        return {f'{source}_{target}', f'{target}_{source}'}
+    return {meta.model_name, f'{meta.model_name}s', meta.db_table}
+
+
+def dependency_levels(models):
+    """Разбивает модели на уровни: внешние ключи ведут в уровни выше."""
+    models = set(models)
+    depends = {
+        model: {
+            field.related_model for field in model._meta.fields
+            if field.is_relation and field.related_model in models
+            and field.related_model is not model
+        }
+        for model in models
+    }
+    levels = []
+    done = set()
+    while len(done) < len(models):
+        level = [
+            model for model in models - done if depends[model] <= done
+        ]
+        if not level:
+            raise CommandError('Circular foreign keys between: ' + ', '.join(
+                model._meta.label for model in models - done
+            ))
+        levels.append(sorted(level, key=lambda model: model._meta.label))
+        done.update(level)
+    return levels
@@ -0,0 +1,34 @@
+# Generated by Django 2.2.16 on 2026-10-18 19:52
+
+from django.db import migrations
+
+import reviews.fields
+
+
+def fill_search_name(apps, schema_editor):
+    Title = apps.get_model('reviews', 'Title')
+    batch = []
+    for title in Title.objects.only('pk', 'name').iterator(chunk_size=1000):
+        title.search_name = reviews.fields.normalize(title.name)
+        batch.append(title)
+        if len(batch) == 1000:
+            Title.objects.bulk_update(batch, ['search_name'])
+            batch = []
+    Title.objects.bulk_update(batch, ['search_name'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0005_title_year_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='title',
+            name='search_name',
+            field=reviews.fields.NormalizedCharField(db_index=True, default='', max_length=90, source='name', verbose_name='search name'),
+            preserve_default=False,
+        ),
+        migrations.RunPython(fill_search_name, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 2.2.16 on 2026-10-18 20:04
+
+from django.db import migrations
+import reviews.fields
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0006_title_search_name'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='title',
+            name='card',
+            field=reviews.fields.RenderedField(default='', verbose_name='card'),
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 2.2.16 on 2026-10-18 20:50
+
+from django.db import migrations
+import reviews.fields
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0007_title_card'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='title',
+            name='search_name',
+            field=reviews.fields.NormalizedCharField(db_index=True, max_length=540, source='name', verbose_name='search name'),
+        ),
+    ]
@@ -1,6 +1,11 @@
 from django.db import models
+from django.db.models import Count, OuterRef, Subquery, Sum
+from django.db.models.functions import Coalesce
 from django.contrib.auth import get_user_model
 
+from .fields import MAX_EXPANSION, NormalizedCharField, RenderedField
+from .versions import TITLES, bump_version
+
 User = get_user_model()
 
 
@@ -22,8 +27,34 @@ class Genre(models.Model):
         verbose_name = 'Genre'
 
 
+class TitleQuerySet(models.QuerySet):
+    def refresh_rating(self):
+        """Пересчитывает сумму и число оценок одним UPDATE."""
+        bump_version(TITLES)
+        reviews = Review.objects.filter(
+            title=OuterRef('pk')
+        ).order_by().values('title')
+        return self.update(
+            rating_sum=Coalesce(
+                Subquery(reviews.annotate(total=Sum('score'))
+                         .values('total')),
+                0
+            ),
+            rating_count=Coalesce(
+                Subquery(reviews.annotate(total=Count('pk'))
+                         .values('total')),
+                0
+            ),
+        )
+
+
 class Title(models.Model):
     name = models.CharField(max_length=30, unique=True, verbose_name='name')
+    # NFKC и casefold() удлиняют строку (ß -> ss, U+FDFA — 18 символов).
+    search_name = NormalizedCharField(
+        max_length=30 * MAX_EXPANSION, source='name', db_index=True,
+        verbose_name='search name'
+    )
     description = models.TextField(verbose_name='description')
     year = models.IntegerField()
     genre = models.ManyToManyField(
@@ -38,11 +69,31 @@ class Title(models.Model):
         null=True,
         verbose_name='category'
     )
+    rating_sum = models.IntegerField(
+        default=0, editable=False, verbose_name='rating sum'
+    )
+    rating_count = models.PositiveIntegerField(
+        default=0, editable=False, verbose_name='rating count'
+    )
+    # JSON карточки для API, см. api/cards.py.
+    card = RenderedField(verbose_name='card')
+
+    objects = TitleQuerySet.as_manager()
 
     class Meta:
         ordering = ('name', 'year',)
+        indexes = [
+            # Фильтр по году сразу отдаёт строки в порядке сортировки.
+            models.Index(fields=['year', 'name'], name='title_year_name_idx'),
+        ]
         verbose_name = 'Title'
 
+    @property
+    def rating(self):
+        if not self.rating_count:
+            return None
+        return self.rating_sum / self.rating_count
+
 
 class Review(models.Model):
     text = models.TextField()
@@ -64,6 +115,9 @@ class Review(models.Model):
                 fields=['author', 'title'],
                 name='unique_author_title')
         ]
+        indexes = [
+            models.Index(fields=['title', 'id'], name='review_title_id_idx'),
+        ]
 
         ordering = ['pk']
 
@@ -81,4 +135,9 @@ class Comment(models.Model):
     )
 
     class Meta:
+        indexes = [
+            models.Index(fields=['review', 'id'],
+                         name='comment_review_id_idx'),
+        ]
+
         ordering = ['pk']
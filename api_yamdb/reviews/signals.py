@@ -0,0 +1,299 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db.models import F
+from django.db.models.signals import (m2m_changed, post_delete, post_init,
+                                      post_save, pre_delete)
+from django.dispatch import Signal, receiver
+
+from .catalog import category_catalog, genre_catalog
+from .models import Category, Comment, Genre, Review, Title
+from .transactions import transaction_state
+from .versions import (AUTHORS, REVIEWS, TITLES, USERS, bump_version,
+                       title_version)
+
+User = get_user_model()
+
+# Отправляется после массовой загрузки, которая обходит post_save.
+bulk_imported = Signal()
+
+# Отправляется с title_ids, когда меняется что-то из выводимого
+# в карточке произведения; title_ids=None — все произведения.
+titles_changed = Signal()
+
+
+def _titles_changed(title_ids=None):
+    titles_changed.send(sender=Title, title_ids=title_ids)
+
+
+def _change_rating(title_id, score, count):
+    bump_version(TITLES)
+    # Если счётчик отстал от числа отзывов (например, после прерванной
+    # загрузки), вычитание увело бы его ниже нуля: тогда пересчёт.
+    updated = Title.objects.filter(
+        pk=title_id, rating_count__gte=-count
+    ).update(
+        rating_sum=F('rating_sum') + score,
+        rating_count=F('rating_count') + count,
+    )
+    if not updated:
+        Title.objects.filter(pk=title_id).refresh_rating()
+    _titles_changed([title_id])
+
+
+def _cascade():
+    """Что известно об удалениях в текущей транзакции, или None.
+
+    titles — удаляемые произведения, authors — удаляемые пользователи
+    и произведения с их отзывами, reviews — title_id отзывов, чьи
+    комментарии удаляются.
+    """
+    state = transaction_state()
+    if state is None:
+        return None
+    return state.setdefault('cascade', {
+        'titles': set(), 'authors': {}, 'reviews': {}
+    })
+
+
+def _invalidate_titles(*title_ids):
+    for title_id in set(title_ids) - {None}:
+        bump_version(title_version(title_id))
+
+
+def _snapshot(review):
+    return (review.__dict__.get('title_id'), review.__dict__.get('score'))
+
+
+@receiver(post_init, sender=Review)
+def remember_review_score(sender, instance, **kwargs):
+    instance._rating_snapshot = _snapshot(instance)
+
+
+@receiver(post_save, sender=Review)
+def update_rating_on_save(sender, instance, created, **kwargs):
+    title_id, score = instance.title_id, int(instance.score)
+    _invalidate_titles(title_id, instance._rating_snapshot[0])
+    if created:
+        _change_rating(title_id, score, 1)
+    else:
+        old_title_id, old_score = instance._rating_snapshot
+        if old_title_id is None or old_score is None:
+            Title.objects.filter(
+                pk__in=[title_id, old_title_id]
+            ).refresh_rating()
+            _titles_changed([title_id, old_title_id])
+        elif old_title_id != title_id:
+            _change_rating(old_title_id, -int(old_score), -1)
+            _change_rating(title_id, score, 1)
+        elif int(old_score) != score:
+            _change_rating(title_id, score - int(old_score), 0)
+    instance._rating_snapshot = (title_id, score)
+
+
+@receiver(pre_delete, sender=Review)
+def remember_deleted_review(sender, instance, **kwargs):
+    cascade = _cascade()
+    if cascade is not None:
+        cascade['reviews'][instance.pk] = instance.title_id
+
+
+@receiver(post_delete, sender=Review)
+def update_rating_on_delete(sender, instance, **kwargs):
+    title_id, score = instance._rating_snapshot
+    if title_id is None:
+        title_id = instance.title_id
+    _invalidate_titles(title_id)
+    cascade = _cascade()
+    if cascade is not None and (
+        title_id in cascade['titles']
+        or instance.author_id in cascade['authors']
+    ):
+        # Каскад вместе с произведением или автором: рейтинг удалённого
+        # произведения не нужен, остальные пересчитает удаление автора.
+        return
+    if score is None:
+        Title.objects.filter(pk=title_id).refresh_rating()
+        _titles_changed([title_id])
+    else:
+        _change_rating(title_id, -int(score), -1)
+
+
+@receiver(post_save, sender=Title)
+@receiver(post_delete, sender=Title)
+@receiver(m2m_changed, sender=Title.genre.through)
+@receiver(bulk_imported, sender=Title)
+@receiver(bulk_imported, sender=Title.genre.through)
+def invalidate_titles(sender, **kwargs):
+    bump_version(TITLES)
+
+
+@receiver(post_save, sender=Title)
+def title_saved(sender, instance, **kwargs):
+    _titles_changed([instance.pk])
+
+
+@receiver(m2m_changed, sender=Title.genre.through)
+def title_genres_changed(sender, instance, action, reverse, pk_set,
+                         **kwargs):
+    if not action.startswith('post_'):
+        return
+    if not reverse:
+        _titles_changed([instance.pk])
+    elif pk_set is not None:
+        _titles_changed(list(pk_set))
+    else:
+        # clear() со стороны жанра не сообщает, какие связи удалены.
+        _titles_changed()
+
+
+@receiver(bulk_imported, sender=Title)
+@receiver(bulk_imported, sender=Title.genre.through)
+@receiver(bulk_imported, sender=Category)
+@receiver(bulk_imported, sender=Genre)
+def titles_imported(sender, **kwargs):
+    _titles_changed()
+
+
+@receiver(pre_delete, sender=Category)
+@receiver(pre_delete, sender=Genre)
+def remember_catalog_titles(sender, instance, **kwargs):
+    # После удаления связи с произведениями уже не найти.
+    instance._title_ids = _catalog_titles(instance)
+
+
+@receiver(post_save, sender=Category)
+@receiver(post_save, sender=Genre)
+@receiver(post_delete, sender=Category)
+@receiver(post_delete, sender=Genre)
+def catalog_item_changed(sender, instance, created=False, **kwargs):
+    if created:
+        return
+    title_ids = getattr(instance, '_title_ids', None)
+    if title_ids is None:
+        title_ids = _catalog_titles(instance)
+    if title_ids:
+        _titles_changed(title_ids)
+
+
+def _catalog_titles(instance):
+    if isinstance(instance, Category):
+        titles = Title.objects.filter(category=instance)
+    else:
+        titles = Title.objects.filter(genre=instance)
+    return list(titles.values_list('pk', flat=True))
+
+
+@receiver(pre_delete, sender=Title)
+def remember_deleted_title(sender, instance, **kwargs):
+    cascade = _cascade()
+    if cascade is not None:
+        cascade['titles'].add(instance.pk)
+
+
+@receiver(post_delete, sender=Title)
+def invalidate_deleted_title(sender, instance, **kwargs):
+    # Закэшированные отзывы удалённого произведения не должны
+    # отдаваться вместо 404, даже если отзывов не было.
+    _invalidate_titles(instance.pk)
+
+
+@receiver(post_save, sender=Comment)
+@receiver(post_delete, sender=Comment)
+def invalidate_comment_title(sender, instance, **kwargs):
+    cascade = _cascade()
+    if Comment.review.is_cached(instance):
+        title_id = instance.review.title_id
+    elif cascade is not None and instance.review_id in cascade['reviews']:
+        title_id = cascade['reviews'][instance.review_id]
+    else:
+        # Отзыв не загружен и не попал в каскад: один запрос.
+        title_id = Review.objects.filter(
+            pk=instance.review_id
+        ).values_list('title_id', flat=True).first()
+    _invalidate_titles(title_id)
+
+
+@receiver(bulk_imported, sender=Review)
+@receiver(bulk_imported, sender=Comment)
+def invalidate_reviews_after_import(sender, **kwargs):
+    bump_version(REVIEWS)
+
+
+@receiver(post_init, sender=User)
+def remember_username(sender, instance, **kwargs):
+    instance._username_snapshot = instance.__dict__.get('username')
+
+
+@receiver(post_save, sender=User)
+def invalidate_users(sender, instance, created, **kwargs):
+    bump_version(USERS)
+    if not created and instance.username != instance._username_snapshot:
+        bump_version(AUTHORS)
+    instance._username_snapshot = instance.username
+
+
+@receiver(pre_delete, sender=User)
+def remember_deleted_author(sender, instance, **kwargs):
+    # Отзывы и комментарии автора удаляются каскадом по одному;
+    # их произведения находятся заранее двумя запросами.
+    cascade = _cascade()
+    if cascade is None:
+        return
+    cascade['authors'][instance.pk] = set(
+        Review.objects.filter(author=instance)
+        .values_list('title_id', flat=True)
+    )
+    cascade['reviews'].update(
+        Comment.objects.filter(author=instance)
+        .values_list('review_id', 'review__title_id')
+    )
+
+
+@receiver(post_delete, sender=User)
+def recount_author_titles(sender, instance, **kwargs):
+    cascade = _cascade()
+    title_ids = cascade and cascade['authors'].pop(instance.pk, None)
+    if title_ids:
+        Title.objects.filter(pk__in=title_ids).refresh_rating()
+        _titles_changed(list(title_ids))
+
+
+@receiver(post_delete, sender=User)
+@receiver(bulk_imported, sender=User)
+def invalidate_authors(sender, **kwargs):
+    bump_version(USERS)
+    bump_version(AUTHORS)
+
+
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+def invalidate_category_catalog(sender, **kwargs):
+    category_catalog.invalidate()
+
+
+@receiver(post_save, sender=Genre)
+@receiver(post_delete, sender=Genre)
+def invalidate_genre_catalog(sender, **kwargs):
+    genre_catalog.invalidate()
+
+
+@receiver(bulk_imported, sender=Review)
+def refresh_rating_after_import(sender, **kwargs):
+    Title.objects.all().refresh_rating()
+    _titles_changed()
+
+
+@receiver(bulk_imported, sender=Category)
+def refresh_category_catalog_after_import(sender, **kwargs):
+    category_catalog.invalidate()
+
+
+@receiver(bulk_imported, sender=Genre)
+def refresh_genre_catalog_after_import(sender, **kwargs):
+    genre_catalog.invalidate()
+
+
+def clear_cache_after_migrate(sender, **kwargs):
+    # migrate и flush меняют данные в обход сигналов моделей,
+    # поэтому всё, что построено поверх БД, сбрасывается.
+    cache.clear()
@@ -0,0 +1,50 @@
+"""Состояние текущей транзакции и слитые on_commit.
+
+Каскадное удаление шлёт сигналы на каждую строку. Чтобы сбрасывать
+версии и перестраивать карточки не по разу на строку, такие вызовы
+копятся до фиксации транзакции и выполняются один раз.
+"""
+from django.db import transaction
+
+
+def transaction_state(using=None):
+    """Словарь, живущий до конца текущей транзакции; вне её — None.
+
+    Django заводит новый список run_on_commit при фиксации и откате,
+    по нему и видно, что транзакция сменилась. После отката точки
+    сохранения состояние тоже начинается заново: лишний вызов
+    безопаснее потерянного.
+    """
+    connection = transaction.get_connection(using)
+    if not connection.in_atomic_block:
+        return None
+    state = getattr(connection, '_transaction_state', None)
+    if state is None or state[0] is not connection.run_on_commit:
+        state = (connection.run_on_commit, {})
+        connection._transaction_state = state
+    return state[1]
+
+
+def on_commit_merged(key, items, func, using=None):
+    """Вызывает func(items) после фиксации, один раз на key.
+
+    Вызовы с тем же key в той же транзакции добавляют свои items
+    к уже запланированным. items=None означает «все» и поглощает
+    остальные. Вне транзакции func вызывается сразу.
+    """
+    items = None if items is None else set(items)
+    state = transaction_state(using)
+    if state is None:
+        func(items)
+        return
+    pending = state.setdefault('on_commit', {})
+    if key in pending:
+        merged = pending[key]
+        if merged[0] is not None:
+            if items is None:
+                merged[0] = None
+            else:
+                merged[0].update(items)
+        return
+    merged = pending[key] = [items]
+    transaction.on_commit(lambda: func(merged[0]), using=using)
@@ -0,0 +1,70 @@
+"""Счётчики версий данных в общем кэше Django.
+
+Версия растёт при каждой записи и служит частью ключа для кэшей,
+построенных поверх БД. Отсутствующая версия инициализируется текущим
+временем, поэтому после очистки кэша старые значения не повторяются.
+"""
+import time
+
+from django.core.cache import cache
+
+from .transactions import on_commit_merged
+
+KEY_PREFIX = 'version:'
+
+# Версия всех ответов со списком и карточками произведений.
+TITLES = 'titles'
+# Поднимается массовой загрузкой отзывов и комментариев, которая
+# не знает, каких произведений коснулась.
+REVIEWS = 'reviews'
+# Ответы со списком и профилями пользователей.
+USERS = 'users'
+# Имена авторов в отзывах и комментариях: меняется только при смене
+# имени или удалении пользователя, а не при каждом сохранении.
+AUTHORS = 'authors'
+
+
+def _key(name):
+    return KEY_PREFIX + name
+
+
+def title_version(title_id):
+    """Версия отзывов и комментариев одного произведения."""
+    return f'title:{title_id}'
+
+
+def _now():
+    return time.time_ns() // 1000
+
+
+def get_version(name):
+    version = cache.get(_key(name))
+    if version is None:
+        cache.add(_key(name), _now(), None)
+        version = cache.get(_key(name))
+    return version
+
+
+def get_versions(names):
+    """Версии нескольких счётчиков одним обращением к кэшу."""
+    found = cache.get_many([_key(name) for name in names])
+    return [
+        found.get(_key(name)) or get_version(name) for name in names
+    ]
+
+
+def _bump(names):
+    keys = [_key(name) for name in names]
+    current = cache.get_many(keys)
+    now = _now()
+    cache.set_many({
+        key: max(now, current.get(key, 0) + 1) for key in keys
+    }, None)
+
+
+def bump_version(name):
+    """Увеличивает версию после фиксации текущей транзакции.
+
+    Версии, поднятые в одной транзакции, записываются в кэш разом.
+    """
+    on_commit_merged('versions', [name], _bump)
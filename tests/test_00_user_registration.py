@@ -279,3 +279,17 @@ class Test00UserRegistration:
             f'Проверьте, что при {request_type} запросе `{self.url_signup}` нельзя создать '
             f'пользователя, username которого уже зарегистрирован и возвращается статус {code}'
         )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_00_obtain_jwt_token_with_emailed_code(self, client):
+        data = {'email': 'code@yamdb.fake', 'username': 'code_user'}
+        response = client.post(self.url_signup, data=data)
+        assert response.status_code == 200
+        code = mail.outbox[-1].body
+        response = client.post(self.url_token, data={
+            'username': data['username'], 'confirmation_code': code
+        })
+        assert response.status_code == 200 and 'token' in response.json(), (
+            f'Проверьте, что POST запрос `{self.url_token}` с кодом из письма '
+            f'возвращает токен, даже если код длиннее 20 символов ({len(code)})'
+        )
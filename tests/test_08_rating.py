@@ -0,0 +1,89 @@
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+
+from .common import auth_client, create_reviews
+
+
+def get_title(titles):
+    from reviews.models import Title
+    return Title.objects.get(pk=titles[0]['id'])
+
+
+class Test08TitleRating:
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_rating_on_create(self, admin_client, admin):
+        _, titles, _, _ = create_reviews(admin_client, admin)
+        title = get_title(titles)
+        assert (title.rating_sum, title.rating_count) == (12, 3), (
+            'Проверьте, что при создании отзыва сумма и число оценок '
+            'произведения обновляются'
+        )
+        response = admin_client.get(f'/api/v1/titles/{titles[0]["id"]}/')
+        assert response.json()['rating'] == 4, (
+            'Проверьте, что `rating` произведения считается по сохранённым '
+            'сумме и числу оценок'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_rating_on_update_and_delete(self, admin_client, admin):
+        reviews, titles, user, _ = create_reviews(admin_client, admin)
+        url = f'/api/v1/titles/{titles[0]["id"]}/reviews/'
+        response = auth_client(user).patch(
+            f'{url}{reviews[1]["id"]}/', data={'score': 9}
+        )
+        assert response.status_code == 200
+        title = get_title(titles)
+        assert (title.rating_sum, title.rating_count) == (18, 3), (
+            'Проверьте, что при изменении оценки в отзыве '
+            'сумма оценок произведения пересчитывается'
+        )
+        admin_client.delete(f'{url}{reviews[0]["id"]}/')
+        title = get_title(titles)
+        assert (title.rating_sum, title.rating_count) == (13, 2), (
+            'Проверьте, что при удалении отзыва '
+            'сумма и число оценок произведения уменьшаются'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_03_rating_on_cascade_delete(self, admin_client, admin):
+        _, titles, user, _ = create_reviews(admin_client, admin)
+        user.delete()
+        title = get_title(titles)
+        assert (title.rating_sum, title.rating_count) == (9, 2), (
+            'Проверьте, что при удалении пользователя его оценки '
+            'вычитаются из рейтинга произведения'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_04_rebuildrating_command(self, admin_client, admin):
+        from reviews.models import Title
+        _, titles, _, _ = create_reviews(admin_client, admin)
+        Title.objects.update(rating_sum=0, rating_count=0)
+        call_command('rebuildrating', stdout=StringIO())
+        title = get_title(titles)
+        assert (title.rating_sum, title.rating_count) == (12, 3), (
+            'Проверьте, что команда `rebuildrating` пересчитывает '
+            'рейтинг всех произведений'
+        )
+        assert Title.objects.get(pk=titles[1]['id']).rating is None
+
+    @pytest.mark.django_db(transaction=True)
+    def test_05_delete_with_stale_counter(self, admin_client, admin):
+        from reviews.models import Title
+        reviews, titles, _, _ = create_reviews(admin_client, admin)
+        Title.objects.update(rating_sum=0, rating_count=0)
+        response = admin_client.delete(
+            f'/api/v1/titles/{titles[0]["id"]}/reviews/{reviews[0]["id"]}/'
+        )
+        assert response.status_code == 204, (
+            'Проверьте, что отзыв удаляется, даже если счётчик оценок '
+            'произведения отстал от числа отзывов'
+        )
+        title = get_title(titles)
+        assert (title.rating_sum, title.rating_count) == (7, 2), (
+            'Проверьте, что при отставшем счётчике рейтинг '
+            'пересчитывается по отзывам'
+        )
@@ -0,0 +1,109 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from .common import create_categories, create_genre
+
+
+def post_titles(admin_client, genres, start, count):
+    for i in range(start, start + count):
+        data = {'name': f'Произведение {i}', 'year': 2000 + i,
+                'genre': [genre['slug'] for genre in genres],
+                'category': 'films', 'description': 'Описание'}
+        response = admin_client.post('/api/v1/titles/', data=data)
+        assert response.status_code == 201
+
+
+def create_many_titles(admin_client, count):
+    genres = create_genre(admin_client)
+    categories = create_categories(admin_client)
+    post_titles(admin_client, genres, 0, count)
+    return genres, categories
+
+
+def count_queries(client, url):
+    with CaptureQueriesContext(connection) as context:
+        response = client.get(url)
+    assert response.status_code == 200
+    return len(context), response.json()
+
+
+class Test09TitleQueries:
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_list_queries_do_not_grow(self, client, admin_client):
+        genres, _ = create_many_titles(admin_client, 1)
+        one, _ = count_queries(client, '/api/v1/titles/')
+        post_titles(admin_client, genres, 1, 4)
+        many, data = count_queries(client, '/api/v1/titles/')
+        assert len(data['results']) == 5
+        assert one == many, (
+            'Проверьте, что число запросов к БД при GET запросе '
+            '`/api/v1/titles/` не зависит от числа произведений на странице '
+            '(используйте `select_related` и `prefetch_related`)'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_detail_queries(self, client, admin_client):
+        create_many_titles(admin_client, 1)
+        from reviews.models import Title
+        title = Title.objects.get()
+        queries, data = count_queries(client, f'/api/v1/titles/{title.pk}/')
+        assert len(data['genre']) == 3
+        assert queries <= 2, (
+            'Проверьте, что при GET запросе `/api/v1/titles/{title_id}/` '
+            'жанры и категория загружаются без дополнительных запросов '
+            'на каждый связанный объект'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_03_filtered_list_queries(self, client, admin_client):
+        genres, categories = create_many_titles(admin_client, 1)
+        url = (f'/api/v1/titles/?genre={genres[0]["slug"]}'
+               f'&category={categories[0]["slug"]}')
+        one, _ = count_queries(client, url)
+        post_titles(admin_client, genres, 1, 8)
+        many, data = count_queries(client, url)
+        assert len(data['results']) == 5
+        assert one == many, (
+            'Проверьте, что число запросов к БД при фильтрации '
+            '`/api/v1/titles/` не зависит от числа произведений на странице'
+        )
+
+
+    @pytest.mark.django_db(transaction=True)
+    def test_04_write_queries_with_many_genres(self, admin_client):
+        from reviews.models import Genre, Title
+        create_categories(admin_client)
+        slugs = [f'genre-{i}' for i in range(40)]
+        Genre.objects.bulk_create(
+            Genre(name=slug, slug=slug) for slug in slugs
+        )
+
+        def write(method, url, genres, name):
+            data = {'name': name, 'year': 2000, 'genre': genres,
+                    'category': 'films', 'description': 'Описание'}
+            with CaptureQueriesContext(connection) as context:
+                response = getattr(admin_client, method)(url, data=data)
+            assert response.status_code in (200, 201)
+            return len(context), response.json()
+
+        admin_client.get('/api/v1/genres/')
+        admin_client.get('/api/v1/categories/')
+        one, _ = write('post', '/api/v1/titles/', slugs[:1], 'Один жанр')
+        many, data = write('post', '/api/v1/titles/', slugs[:20], 'Много')
+        assert sorted(data['genre']) == sorted(slugs[:20])
+        assert one == many, (
+            'Проверьте, что число запросов при POST запросе '
+            '`/api/v1/titles/` не зависит от числа жанров'
+        )
+        url = f'/api/v1/titles/{data["id"]}/'
+        patch_one, _ = write('patch', url, slugs[19:21], 'Много')
+        patch_many, data = write('patch', url, slugs[20:], 'Много')
+        assert sorted(data['genre']) == sorted(slugs[20:])
+        assert patch_one == patch_many, (
+            'Проверьте, что число запросов при PATCH запросе '
+            '`/api/v1/titles/{title_id}/` не зависит от числа жанров'
+        )
+        title = Title.objects.get(pk=data['id'])
+        assert title.genre.count() == 20
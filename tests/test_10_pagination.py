@@ -0,0 +1,122 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from .common import (create_comments, create_reviews, create_titles,
+                     create_users_api)
+
+
+def walk(client, url):
+    ids = []
+    sql = []
+    while url:
+        with CaptureQueriesContext(connection) as context:
+            response = client.get(url)
+        assert response.status_code == 200
+        data = response.json()
+        assert 'count' not in data, (
+            'Проверьте, что в режиме `?cursor=` ответ не содержит `count`'
+        )
+        ids.extend(item['id'] for item in data['results'])
+        sql.extend(query['sql'] for query in context.captured_queries)
+        url = data['next']
+    return ids, sql
+
+
+class Test10Pagination:
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_reviews_cursor(self, monkeypatch, admin_client, admin):
+        from api.pagination import ReviewsPagination
+        monkeypatch.setattr(ReviewsPagination, 'page_size', 2)
+        reviews, titles, _, _ = create_reviews(admin_client, admin)
+        url = f'/api/v1/titles/{titles[0]["id"]}/reviews/'
+        ids, sql = walk(admin_client, f'{url}?cursor=')
+        assert ids == [review['id'] for review in reviews], (
+            'Проверьте, что при GET запросе '
+            '`/api/v1/titles/{title_id}/reviews/?cursor=` '
+            'курсорная пагинация возвращает все отзывы по порядку'
+        )
+        assert not any('OFFSET' in query for query in sql), (
+            'Проверьте, что курсорная пагинация не использует OFFSET'
+        )
+        assert not any('COUNT(' in query for query in sql), (
+            'Проверьте, что курсорная пагинация не выполняет COUNT(*)'
+        )
+        response = admin_client.get(url)
+        assert response.json()['count'] == 3, (
+            'Проверьте, что без параметра `cursor` '
+            'используется постраничная пагинация'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_comments_cursor(self, monkeypatch, admin_client, admin):
+        from api.pagination import CommentsPagination
+        monkeypatch.setattr(CommentsPagination, 'page_size', 2)
+        comments, reviews, titles, _, _ = create_comments(admin_client, admin)
+        url = (f'/api/v1/titles/{titles[0]["id"]}/reviews/'
+               f'{reviews[0]["id"]}/comments/?cursor=')
+        ids, _ = walk(admin_client, url)
+        assert ids == [comment['id'] for comment in comments], (
+            'Проверьте, что при GET запросе '
+            '`/api/v1/titles/{title_id}/reviews/{review_id}/comments/'
+            '?cursor=` курсорная пагинация возвращает все комментарии'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_03_titles_without_count(self, client, admin_client):
+        titles, _, _ = create_titles(admin_client)
+        with CaptureQueriesContext(connection) as context:
+            response = client.get('/api/v1/titles/?count=false&page=1')
+        data = response.json()
+        assert 'count' not in data and len(data['results']) == 2, (
+            'Проверьте, что при GET запросе `/api/v1/titles/?count=false` '
+            'ответ содержит результаты без `count`'
+        )
+        assert not any(
+            'COUNT(' in query['sql'] for query in context.captured_queries
+        ), 'Проверьте, что при `?count=false` не выполняется COUNT(*)'
+        assert data['next'] is None
+        response = client.get('/api/v1/titles/?count=false&page=2')
+        assert response.status_code == 404, (
+            'Проверьте, что несуществующая страница при `?count=false` '
+            'возвращает статус 404'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_04_users_without_count_next(self, monkeypatch, admin_client):
+        from api.pagination import UserPagination
+        monkeypatch.setattr(UserPagination, 'page_size', 1)
+        response = admin_client.get('/api/v1/users/?count=0')
+        assert response.json()['next'] is None
+        create_users_api(admin_client)
+        response = admin_client.get('/api/v1/users/?count=0')
+        data = response.json()
+        assert 'count=0' in data['next'] and 'page=2' in data['next'], (
+            'Проверьте, что при `?count=0` ссылка `next` ведёт '
+            'на следующую страницу'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_05_cached_count(self, settings, client, admin_client):
+        from django.core.cache import cache
+        from reviews.models import Title
+        cache.clear()
+        settings.PAGINATION_COUNT_CACHE_TIMEOUT = 60
+        titles, _, _ = create_titles(admin_client)
+        assert client.get('/api/v1/titles/').json()['count'] == 2
+        Title.objects.filter(pk=titles[0]['id']).delete()
+        with CaptureQueriesContext(connection) as context:
+            response = client.get('/api/v1/titles/')
+        assert response.json()['count'] == 2, (
+            'Проверьте, что число записей берётся из кэша, '
+            'если задан `PAGINATION_COUNT_CACHE_TIMEOUT`'
+        )
+        assert not any(
+            'COUNT(' in query['sql'] for query in context.captured_queries
+        )
+        response = client.get('/api/v1/titles/?year=2000')
+        assert response.json()['count'] == 0, (
+            'Проверьте, что кэш числа записей учитывает набор фильтров'
+        )
+        cache.clear()
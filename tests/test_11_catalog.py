@@ -0,0 +1,78 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from .common import create_categories, create_genre, create_titles
+
+
+def tables_queried(client, url):
+    with CaptureQueriesContext(connection) as context:
+        response = client.get(url)
+    assert response.status_code == 200
+    sql = ' '.join(query['sql'] for query in context.captured_queries)
+    return sql, response.json()
+
+
+class Test11Catalog:
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_list_from_catalog(self, client, admin_client):
+        create_categories(admin_client)
+        create_genre(admin_client)
+        for url, table in (('/api/v1/categories/', 'reviews_category'),
+                           ('/api/v1/genres/', 'reviews_genre')):
+            client.get(url)
+            sql, data = tables_queried(client, url)
+            assert table not in sql, (
+                f'Проверьте, что повторный GET запрос `{url}` '
+                'берёт данные из справочника в памяти'
+            )
+            assert data['count'] == len(data['results'])
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_catalog_invalidation(self, client, admin_client):
+        create_categories(admin_client)
+        assert client.get('/api/v1/categories/').json()['count'] == 2
+        admin_client.post('/api/v1/categories/',
+                          data={'name': 'Музыка', 'slug': 'music'})
+        data = client.get('/api/v1/categories/').json()
+        assert 'music' in [item['slug'] for item in data['results']], (
+            'Проверьте, что справочник категорий обновляется '
+            'после создания категории'
+        )
+        admin_client.delete('/api/v1/categories/music/')
+        data = client.get('/api/v1/categories/').json()
+        assert 'music' not in [item['slug'] for item in data['results']], (
+            'Проверьте, что справочник категорий обновляется '
+            'после удаления категории'
+        )
+        data = client.get('/api/v1/categories/?search=Фил').json()
+        assert data['count'] == 1, (
+            'Проверьте, что поиск по категориям по-прежнему работает'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_03_filter_validation(self, client, admin_client):
+        titles, categories, genres = create_titles(admin_client)
+        client.get('/api/v1/titles/')
+        sql, data = tables_queried(
+            client, f'/api/v1/titles/?genre={genres[0]["slug"]}'
+        )
+        assert 'FROM "reviews_genre" WHERE' not in sql, (
+            'Проверьте, что фильтр по жанру проверяет slug '
+            'по справочнику в памяти'
+        )
+        assert [item['id'] for item in data['results']] == [titles[0]['id']]
+        response = client.get('/api/v1/titles/?genre=unknown')
+        assert response.status_code == 400, (
+            'Проверьте, что фильтр по несуществующему жанру '
+            'возвращает статус 400'
+        )
+        response = admin_client.post('/api/v1/titles/', data={
+            'name': 'Новое', 'year': 2001, 'genre': ['unknown'],
+            'category': categories[0]['slug'], 'description': ''
+        })
+        assert response.status_code == 400, (
+            'Проверьте, что при POST запросе `/api/v1/titles/` '
+            'с несуществующим жанром возвращается статус 400'
+        )
@@ -0,0 +1,214 @@
+import os
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+from django.core.management.base import CommandError
+
+from .conftest import MANAGE_PATH
+
+DATA_DIR = os.path.join(MANAGE_PATH, 'static', 'data')
+
+
+def import_csv(name, model_name, **options):
+    out = StringIO()
+    call_command('importcsv', path=os.path.join(DATA_DIR, name),
+                 model_name=model_name, stdout=out, **options)
+    return out.getvalue()
+
+
+class Test12ImportCsv:
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_import_in_batches(self, client):
+        from reviews.models import Genre
+        client.get('/api/v1/genres/')
+        output = import_csv('genre.csv', 'reviews.Genre', batch_size=4)
+        assert Genre.objects.count() == 15, (
+            'Проверьте, что команда `importcsv` загружает все строки файла'
+        )
+        assert 'rows/sec' in output, (
+            'Проверьте, что команда `importcsv` сообщает скорость загрузки'
+        )
+        data = client.get('/api/v1/genres/').json()
+        assert data['count'] == 15, (
+            'Проверьте, что после загрузки справочник жанров обновляется'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_integrity_error_line(self):
+        from reviews.models import Category
+        import_csv('category.csv', 'reviews.Category')
+        Category.objects.filter(pk=2).delete()
+        with pytest.raises(CommandError) as err:
+            import_csv('category.csv', 'reviews.Category', batch_size=2)
+        assert '1, Фильм, movie' in str(err.value), (
+            'Проверьте, что при ошибке целостности команда `importcsv` '
+            'показывает строку, которую не удалось загрузить'
+        )
+        assert not Category.objects.filter(pk=2).exists(), (
+            'Проверьте, что пачка с ошибкой откатывается целиком'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_03_bad_arguments(self):
+        with pytest.raises(CommandError):
+            import_csv('missing.csv', 'reviews.Genre')
+        with pytest.raises(CommandError):
+            import_csv('genre.csv', 'reviews.Missing')
+
+
+def copy_data(directory, *names):
+    for name in names:
+        with open(os.path.join(DATA_DIR, name), encoding='utf-8') as src:
+            (directory / name).write_text(src.read(), encoding='utf-8')
+
+
+class Test12ImportData:
+
+    def test_01_dependency_order(self):
+        from django.apps import apps
+        from reviews.management.loader import dependency_levels
+        from reviews.models import Category, Comment, Review, Title
+        from users.models import User
+        through = Title.genre.through
+        models = list(apps.get_app_config('reviews').get_models(
+            include_auto_created=True
+        )) + [User]
+        order = [model for level in dependency_levels(models)
+                 for model in level]
+        for before, after in ((Category, Title), (Title, through),
+                              (User, Review), (Title, Review),
+                              (Review, Comment)):
+            assert order.index(before) < order.index(after), (
+                f'Проверьте, что {before.__name__} загружается '
+                f'раньше {after.__name__}'
+            )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_resume_after_error(self, tmp_path):
+        from reviews.models import Category, Genre
+        copy_data(tmp_path, 'category.csv', 'users.csv')
+        (tmp_path / 'genre.csv').write_text(
+            'id,name,slug\n1,Драма,drama\n2,Комедия,drama\n',
+            encoding='utf-8'
+        )
+        with pytest.raises(CommandError):
+            call_command('importdata', str(tmp_path), stdout=StringIO())
+        assert Category.objects.count() == 3
+        assert (tmp_path / '.importdata.json').exists(), (
+            'Проверьте, что команда `importdata` сохраняет прогресс '
+            'после ошибки'
+        )
+        copy_data(tmp_path, 'genre.csv')
+        call_command('importdata', str(tmp_path), stdout=StringIO())
+        assert Category.objects.count() == 3, (
+            'Проверьте, что повторный запуск `importdata` '
+            'не загружает уже загруженные файлы'
+        )
+        assert Genre.objects.count() == 15
+        assert not (tmp_path / '.importdata.json').exists(), (
+            'Проверьте, что после успешной загрузки файл прогресса удаляется'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_03_foreign_keys(self, tmp_path):
+        from reviews.models import Title
+        copy_data(tmp_path, 'category.csv', 'genre.csv', 'users.csv')
+        (tmp_path / 'titles.csv').write_text(
+            'id,name,year,category\n1,Побег,1994,1\n2,Без категории,2000,\n',
+            encoding='utf-8'
+        )
+        (tmp_path / 'genre_title.csv').write_text(
+            'id,title_id,genre_id\n1,1,1\n2,1,2\n', encoding='utf-8'
+        )
+        (tmp_path / 'review.csv').write_text(
+            'id,title_id,text,author,score,pub_date\n'
+            '1,1,Отлично,100,10,2019-09-24T21:08:21.567Z\n'
+            '2,1,Неплохо,101,7,2019-09-24T21:08:21.567Z\n',
+            encoding='utf-8'
+        )
+        call_command('importdata', str(tmp_path), stdout=StringIO())
+        title = Title.objects.get(pk=1)
+        assert title.category.slug == 'movie', (
+            'Проверьте, что колонка `category` загружается '
+            'во внешний ключ `category_id`'
+        )
+        assert Title.objects.get(pk=2).category is None
+        assert sorted(title.genre.values_list('slug', flat=True)) == [
+            'comedy', 'drama'
+        ], 'Проверьте, что `genre_title.csv` загружается в связь Title.genre'
+        assert (title.rating_sum, title.rating_count) == (17, 2), (
+            'Проверьте, что после загрузки отзывов рейтинг пересчитывается'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_04_missing_reference(self, tmp_path):
+        copy_data(tmp_path, 'category.csv')
+        (tmp_path / 'titles.csv').write_text(
+            'id,name,year,category\n1,Побег,1994,1\n2,Потерянный,2000,9\n',
+            encoding='utf-8'
+        )
+        with pytest.raises(CommandError) as err:
+            call_command('importdata', str(tmp_path), stdout=StringIO())
+        assert 'reviews.Category 9 does not exist' in str(err.value)
+        assert '2, Потерянный, 2000, 9' in str(err.value), (
+            'Проверьте, что при ссылке на несуществующую запись '
+            'команда показывает строку файла'
+        )
+
+
+class Test12ImportResume:
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_resume_from_checkpoint(self, client, tmp_path):
+        from reviews.models import Genre
+        client.get('/api/v1/genres/')
+        path = tmp_path / 'genre.csv'
+        checkpoint = tmp_path / 'checkpoint.json'
+        rows = [f'{i},Жанр {i},genre-{i}' for i in range(1, 6)]
+        path.write_text('\n'.join(['id,name,slug'] + rows[:4]
+                                  + ['5,Жанр 5,genre-1']), encoding='utf-8')
+        options = {'path': str(path), 'model_name': 'reviews.Genre',
+                   'batch_size': 2, 'checkpoint': str(checkpoint),
+                   'stdout': StringIO()}
+        with pytest.raises(CommandError):
+            call_command('importcsv', **options)
+        assert Genre.objects.count() == 4
+        assert client.get('/api/v1/genres/').json()['count'] == 4, (
+            'Проверьте, что после прерванной загрузки кэши сбрасываются '
+            'для уже зафиксированных пачек'
+        )
+        assert '"reviews.Genre:genre.csv": 4' in checkpoint.read_text(), (
+            'Проверьте, что контрольная точка хранит число '
+            'зафиксированных строк'
+        )
+        path.write_text('\n'.join(['id,name,slug'] + rows), encoding='utf-8')
+        call_command('importcsv', **options)
+        assert Genre.objects.count() == 5, (
+            'Проверьте, что повторный запуск `importcsv` с той же '
+            'контрольной точкой загружает только оставшиеся строки'
+        )
+        assert not checkpoint.exists()
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_incremental(self, tmp_path):
+        from reviews.models import Category
+        import_csv('category.csv', 'reviews.Category')
+        path = tmp_path / 'category.csv'
+        path.write_text(
+            'id,name,slug\n1,Фильм,movie\n2,Книги,book\n3,Музыка,music\n'
+            '4,Игры,games\n', encoding='utf-8'
+        )
+        out = StringIO()
+        call_command('importcsv', path=str(path),
+                     model_name='reviews.Category', incremental=True,
+                     stdout=out)
+        assert 'created 1' in out.getvalue()
+        assert 'updated 1' in out.getvalue()
+        assert 'unchanged 2' in out.getvalue(), (
+            'Проверьте, что в режиме `--incremental` неизменённые строки '
+            'не перезаписываются'
+        )
+        assert Category.objects.get(pk=2).name == 'Книги'
+        assert Category.objects.count() == 4
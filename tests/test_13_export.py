@@ -0,0 +1,59 @@
+import json
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+
+from .common import create_reviews
+
+
+class Test13ExportCsv:
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_export_all_csv(self, tmp_path, admin_client, admin):
+        _, titles, _, _ = create_reviews(admin_client, admin)
+        call_command('exportcsv', all=True, output=str(tmp_path),
+                     chunk_size=1, stdout=StringIO())
+        for name in ('user', 'category', 'genre', 'title', 'genre_title',
+                     'review', 'comment'):
+            assert (tmp_path / f'{name}.csv').exists(), (
+                f'Проверьте, что `exportcsv --all` создаёт файл {name}.csv'
+            )
+        lines = (tmp_path / 'title.csv').read_text().splitlines()
+        assert lines[0].split(',')[:5] == [
+            'id', 'name', 'description', 'year', 'category_id'
+        ]
+        assert len(lines) == 1 + len(titles)
+        assert len((tmp_path / 'genre_title.csv').read_text()
+                   .splitlines()) == 4
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_round_trip(self, tmp_path, admin_client, admin):
+        from reviews.models import Review, Title
+        create_reviews(admin_client, admin)
+        call_command('exportcsv', all=True, output=str(tmp_path),
+                     stdout=StringIO())
+        Title.objects.all().delete()
+        call_command('importdata', str(tmp_path), incremental=True,
+                     stdout=StringIO())
+        assert Review.objects.count() == 3, (
+            'Проверьте, что файлы `exportcsv` загружаются '
+            'обратно командой `importdata`'
+        )
+        assert sorted(Title.objects.values_list('rating_sum', flat=True)) \
+            == [0, 12]
+
+    @pytest.mark.django_db(transaction=True)
+    def test_03_export_ndjson(self, tmp_path, admin_client, admin):
+        create_reviews(admin_client, admin)
+        call_command('exportcsv', model_name='reviews.Review',
+                     output=str(tmp_path), format='ndjson',
+                     stdout=StringIO())
+        rows = [json.loads(line) for line in
+                (tmp_path / 'review.ndjson').read_text().splitlines()]
+        assert [row['score'] for row in rows] == [5, 3, 4], (
+            'Проверьте, что `exportcsv --format ndjson` пишет '
+            'по одному JSON-объекту в строке'
+        )
+        assert set(rows[0]) == {'id', 'text', 'pub_date', 'author_id',
+                                'title_id', 'score'}
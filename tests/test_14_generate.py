@@ -0,0 +1,67 @@
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+
+
+def generate(seed=7):
+    call_command('generatedata', users=20, categories=2, genres=5,
+                 titles=30, reviews=100, comments=50, seed=seed,
+                 batch_size=16, stdout=StringIO())
+
+
+class Test14GenerateData:
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_counts_and_rating(self):
+        from reviews.models import Comment, Review, Title
+        generate()
+        assert Title.objects.count() == 30
+        assert Review.objects.count() == 100, (
+            'Проверьте, что `generatedata` создаёт заданное число отзывов'
+        )
+        assert Comment.objects.count() == 50
+        assert sum(Title.objects.values_list('rating_count', flat=True)) \
+            == 100, (
+            'Проверьте, что после `generatedata` рейтинги пересчитаны'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_seed_is_reproducible(self, django_user_model):
+        from reviews.models import Category, Genre, Review, Title
+
+        def snapshot():
+            return list(Review.objects.order_by('pk').values_list(
+                'pk', 'title_id', 'author_id', 'score'
+            ))
+
+        generate()
+        first = snapshot()
+        for model in (Title, Category, Genre, django_user_model):
+            model.objects.all().delete()
+        generate()
+        assert snapshot() == first, (
+            'Проверьте, что один и тот же `--seed` даёт те же данные'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_03_repeated_pairs(self, monkeypatch):
+        from reviews.management.commands import generatedata
+        from reviews.models import Comment, Review
+        # Почти все повторы доходят до БД.
+        monkeypatch.setattr(generatedata, 'SEEN_PAIRS', 4)
+        generate()
+        assert Review.objects.count() == 100, (
+            'Проверьте, что повторные пары произведение—автор отбрасывает '
+            'уникальное ограничение, а отзывы добираются до заданного числа'
+        )
+        assert Comment.objects.count() == 50, (
+            'Проверьте, что комментарии выбирают только сохранённые отзывы, '
+            'даже если в id отзывов есть пропуски'
+        )
+        call_command('generatedata', users=1, categories=1, genres=1,
+                     titles=1, reviews=100, comments=50, seed=8,
+                     batch_size=16, stdout=StringIO())
+        # Один пользователь и одно произведение дают одну пару.
+        assert Review.objects.count() == 101
+        assert Comment.objects.count() == 100
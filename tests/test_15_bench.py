@@ -0,0 +1,56 @@
+import json
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+from django.core.management.base import CommandError
+
+
+def bench(live_server, tmp_path, **options):
+    call_command('generatedata', users=10, categories=2, genres=3,
+                 titles=10, reviews=30, comments=30, stdout=StringIO())
+    output = tmp_path / 'report.json'
+    call_command('benchapi', url=f'{live_server.url}/api/v1', requests=3,
+                 warmup=0, concurrency=1, output=str(output),
+                 stdout=StringIO(), stderr=StringIO(), **options)
+    return json.loads(output.read_text())
+
+
+class Test15BenchApi:
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_report(self, live_server, tmp_path):
+        from reviews.models import Title
+        report = bench(live_server, tmp_path)
+        assert 'titles_filter_category_genre_name_year' in report['scenarios']
+        for name, result in report['scenarios'].items():
+            assert result['errors'] == 0, (
+                f'Проверьте, что сценарий {name} выполняется без ошибок'
+            )
+            assert result['p50'] <= result['p95'] <= result['p99']
+        assert Title.objects.count() == 10, (
+            'Проверьте, что `benchapi` удаляет созданные им объекты'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_baseline_regression(self, live_server, tmp_path):
+        baseline = tmp_path / 'baseline.json'
+        baseline.write_text(json.dumps({'scenarios': {
+            'title_detail': {'p95': 0.001, 'throughput': 10 ** 6},
+        }}))
+        with pytest.raises(CommandError, match='title_detail'):
+            bench(live_server, tmp_path, scenario=['title_detail'],
+                  baseline=str(baseline))
+
+    def test_03_error_regression(self):
+        from api.management.commands.benchapi import compare
+        base = {'requests': 100, 'errors': 1, 'p95': 10, 'throughput': 100}
+        faster = dict(base, errors=40, p95=2, throughput=500)
+        regressions = compare({'scenarios': {'auth_token': faster}},
+                              {'scenarios': {'auth_token': base}}, 0.2)
+        assert regressions and 'errors' in regressions[0], (
+            'Проверьте, что рост числа ошибок считается регрессией, '
+            'даже если ответы стали быстрее'
+        )
+        assert not compare({'scenarios': {'auth_token': base}},
+                           {'scenarios': {'auth_token': base}}, 0.2)
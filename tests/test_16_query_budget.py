@@ -0,0 +1,123 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from api import pagination
+
+PAGE_SIZES = (1, 100)
+ROWS = 101
+
+# Запросов на GET при любом размере страницы: аутентификация по JWT,
+# COUNT(*) пагинации, страница и связанные объекты одним запросом.
+# Произведения отдаются из готовых карточек, без связанных объектов.
+BUDGETS = {
+    '/api/v1/titles/': 3,
+    '/api/v1/titles/?genre=genre-0&category=category-0&year=2000': 3,
+    '/api/v1/titles/{title}/': 2,
+    '/api/v1/titles/{title}/reviews/': 4,
+    '/api/v1/titles/{title}/reviews/?cursor=': 3,
+    '/api/v1/titles/{title}/reviews/{review}/': 3,
+    '/api/v1/titles/{title}/reviews/{review}/comments/': 5,
+    '/api/v1/titles/{title}/reviews/{review}/comments/?cursor=': 4,
+    '/api/v1/users/': 3,
+    '/api/v1/users/?search=user': 3,
+    '/api/v1/users/{username}/': 2,
+    '/api/v1/categories/': 1,
+    '/api/v1/categories/?search=category': 3,
+    '/api/v1/genres/': 1,
+    '/api/v1/genres/?search=genre': 3,
+}
+
+
+@pytest.fixture
+def dataset(django_user_model, admin):
+    from reviews.models import Category, Comment, Genre, Review, Title
+    # bulk_create на SQLite не возвращает pk, поэтому объекты
+    # перечитываются из БД.
+    django_user_model.objects.bulk_create(
+        django_user_model(username=f'user{i}', email=f'user{i}@yamdb.fake')
+        for i in range(ROWS)
+    )
+    users = django_user_model.objects.filter(username__startswith='user')
+    category = Category.objects.create(name='Category 0', slug='category-0')
+    Category.objects.bulk_create(
+        Category(name=f'Category {i}', slug=f'category-{i}')
+        for i in range(1, ROWS)
+    )
+    Genre.objects.bulk_create(
+        Genre(name=f'Genre {i}', slug=f'genre-{i}') for i in range(ROWS)
+    )
+    genres = list(Genre.objects.order_by('pk')[:3])
+    Title.objects.bulk_create(
+        Title(name=f'Title {i}', year=2000, description='Описание',
+              category=category)
+        for i in range(ROWS)
+    )
+    titles = list(Title.objects.order_by('pk'))
+    Title.genre.through.objects.bulk_create(
+        Title.genre.through(title=title, genre=genre)
+        for title in titles for genre in genres
+    )
+    title = titles[0]
+    for user in users:
+        Review.objects.create(title=title, author=user, text='Отзыв',
+                              score=5)
+    review = Review.objects.filter(title=title).first()
+    Comment.objects.bulk_create(
+        Comment(review=review, author=user, text='Комментарий')
+        for user in users
+    )
+    return {'title': title.pk, 'review': review.pk,
+            'username': 'user0'}
+
+
+def set_page_size(monkeypatch, size):
+    for name in ('OptionalCountPagination', 'UserPagination',
+                 'ReviewsPagination', 'CommentsPagination'):
+        monkeypatch.setattr(getattr(pagination, name), 'page_size', size)
+
+
+def run_queries(client, url):
+    with CaptureQueriesContext(connection) as context:
+        response = client.get(url)
+    assert response.status_code == 200, (url, response.json())
+    return [query['sql'] for query in context.captured_queries], \
+        response.json()
+
+
+def page_length(data):
+    return len(data['results']) if 'results' in data else None
+
+
+class Test16QueryBudget:
+
+    @pytest.mark.django_db(transaction=True)
+    @pytest.mark.parametrize('template', BUDGETS)
+    def test_01_query_budget(self, template, admin_client, dataset,
+                             monkeypatch, settings):
+        # Бюджет считается для запросов, которые доходят до БД.
+        settings.RESPONSE_CACHE = False
+        url = template.format(**dataset)
+        # Справочники загружаются в память первым запросом.
+        admin_client.get('/api/v1/categories/')
+        admin_client.get('/api/v1/genres/')
+        # Карточки произведений из bulk_create достраиваются при чтении.
+        set_page_size(monkeypatch, max(PAGE_SIZES))
+        admin_client.get(url)
+        queries = {}
+        for size in PAGE_SIZES:
+            set_page_size(monkeypatch, size)
+            queries[size], data = run_queries(admin_client, url)
+            length = page_length(data)
+            assert length in (None, size), (
+                f'Проверьте, что страница `{url}` содержит {size} объектов'
+            )
+        small, large = (queries[size] for size in PAGE_SIZES)
+        assert len(small) == len(large), (
+            f'Число запросов к БД при GET `{url}` растёт с размером '
+            f'страницы: {len(small)} -> {len(large)}\n' + '\n'.join(large)
+        )
+        assert len(large) <= BUDGETS[template], (
+            f'GET `{url}` выполняет {len(large)} запросов при бюджете '
+            f'{BUDGETS[template]}:\n' + '\n'.join(large)
+        )
@@ -0,0 +1,80 @@
+import pytest
+
+from .common import create_titles
+
+
+class Test17ServerTiming:
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_disabled_by_default(self, admin_client):
+        create_titles(admin_client)
+        response = admin_client.get('/api/v1/titles/')
+        assert 'Server-Timing' not in response, (
+            'Проверьте, что без настройки и заголовка Server-Timing '
+            'не добавляется'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_admin_header(self, admin_client):
+        titles, _, _ = create_titles(admin_client)
+        response = admin_client.get('/api/v1/titles/',
+                                    HTTP_X_SERVER_TIMING='1')
+        names = [item.split(';')[0].strip()
+                 for item in response['Server-Timing'].split(',')]
+        for name in ('db', 'auth', 'permissions', 'serialize', 'render',
+                     'total'):
+            assert name in names, (
+                f'Проверьте, что Server-Timing содержит этап {name}'
+            )
+        response = admin_client.patch(
+            f'/api/v1/titles/{titles[0]["id"]}/', data={'year': 2001},
+            HTTP_X_SERVER_TIMING='1'
+        )
+        assert 'validate;' in response['Server-Timing']
+
+    @pytest.mark.django_db(transaction=True)
+    def test_03_header_ignored_for_non_admin(self, client, user_client):
+        for api_client in (client, user_client):
+            response = api_client.get('/api/v1/titles/',
+                                      HTTP_X_SERVER_TIMING='1')
+            assert response.status_code == 200
+            assert 'Server-Timing' not in response, (
+                'Проверьте, что заголовок X-Server-Timing учитывается '
+                'только для администратора'
+            )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_04_setting_and_profile(self, client, admin_client, settings,
+                                    tmp_path):
+        settings.SERVER_TIMING = True
+        settings.SERVER_TIMING_PROFILE_DIR = str(tmp_path)
+        response = client.get('/api/v1/categories/')
+        assert response['Server-Timing'].startswith('db;dur=')
+        assert not list(tmp_path.iterdir())
+        admin_client.get('/api/v1/genres/', HTTP_X_SERVER_TIMING='profile')
+        assert [path.suffix for path in tmp_path.iterdir()] == ['.prof'], (
+            'Проверьте, что X-Server-Timing: profile сохраняет профиль'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_05_profile_only_for_admin(self, client, user_client,
+                                       admin_client, settings, tmp_path,
+                                       monkeypatch):
+        from api import timing
+        settings.SERVER_TIMING_PROFILE_DIR = str(tmp_path)
+        profile = timing.cProfile.Profile
+
+        def forbidden():
+            raise AssertionError('profiler started')
+
+        monkeypatch.setattr(timing.cProfile, 'Profile', forbidden)
+        for api_client in (client, user_client):
+            response = api_client.get('/api/v1/genres/',
+                                      HTTP_X_SERVER_TIMING='profile')
+            assert response.status_code == 200, (
+                'Проверьте, что профилирование не начинается, пока '
+                'клиент не признан администратором'
+            )
+        monkeypatch.setattr(timing.cProfile, 'Profile', profile)
+        admin_client.get('/api/v1/genres/', HTTP_X_SERVER_TIMING='profile')
+        assert [path.suffix for path in tmp_path.iterdir()] == ['.prof']
@@ -0,0 +1,107 @@
+import json
+import re
+
+import pytest
+
+
+def metric(text, name, **labels):
+    """Значение строки метрики с указанными метками."""
+    for line in text.splitlines():
+        if not line.startswith(name + '{') and not line.startswith(name + ' '):
+            continue
+        found = dict(re.findall(r'(\w+)="([^"]*)"', line))
+        if all(found.get(key) == str(value)
+               for key, value in labels.items()):
+            return float(line.rsplit(' ', 1)[1])
+    return 0
+
+
+@pytest.fixture
+def collector(settings):
+    # Сборщик метрик ходит с адреса тестового клиента.
+    settings.METRICS_ALLOWED_IPS = ['127.0.0.1']
+
+
+class Test18Metrics:
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_route_metrics(self, client, admin_client, collector):
+        before = client.get('/api/v1/metrics/').content.decode()
+        client.get('/api/v1/titles/')
+        client.get('/api/v1/titles/')
+        client.get('/api/v1/titles/999/')
+        response = client.get('/api/v1/metrics/')
+        assert response.status_code == 200
+        assert response['Content-Type'].startswith('text/plain')
+        text = response.content.decode()
+        ok = dict(route='titles-list', method='GET', status=200)
+        assert metric(text, 'http_requests_total', **ok) \
+            - metric(before, 'http_requests_total', **ok) == 2, (
+            'Проверьте, что запросы считаются по маршрутам и статусам'
+        )
+        assert metric(text, 'http_requests_total', route='titles-detail',
+                      status=404) >= 1
+        assert metric(text, 'http_request_duration_seconds_bucket',
+                      route='titles-list', le='+Inf') >= 2
+        assert metric(text, 'db_queries_per_request_count',
+                      route='titles-list') >= 2
+        assert '# TYPE http_request_duration_seconds histogram' in text
+        assert 'cache_requests_total{cache="catalog:reviews.category"' \
+            in text
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_access(self, client, user_client, admin_client):
+        remote = {'REMOTE_ADDR': '10.0.0.1'}
+        assert client.get('/api/v1/metrics/', **remote).status_code == 401
+        assert user_client.get('/api/v1/metrics/',
+                               **remote).status_code == 403
+        assert admin_client.get('/api/v1/metrics/',
+                                **remote).status_code == 200, (
+            'Проверьте, что метрики доступны администратору'
+        )
+        assert client.get('/api/v1/metrics/').status_code == 401, (
+            'Проверьте, что по умолчанию метрики без токена не отдаются '
+            'ни одному адресу'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_04_allowed_ips(self, client, settings):
+        settings.METRICS_ALLOWED_IPS = ['10.0.0.1']
+        assert client.get('/api/v1/metrics/',
+                          REMOTE_ADDR='10.0.0.1').status_code == 200, (
+            'Проверьте, что адреса из METRICS_ALLOWED_IPS читают метрики '
+            'без токена'
+        )
+        assert client.get('/api/v1/metrics/').status_code == 401
+
+    @pytest.mark.django_db(transaction=True)
+    def test_03_multiprocess_files(self, client, settings, tmp_path,
+                                   collector):
+        settings.METRICS_DIR = str(tmp_path)
+        client.get('/api/v1/genres/')
+        local = metric(client.get('/api/v1/metrics/').content.decode(),
+                       'http_requests_total', route='genres-list')
+        (tmp_path / 'metrics-1.json').write_text(json.dumps({
+            'counters': [['http_requests_total',
+                          [['method', 'GET'], ['route', 'genres-list'],
+                           ['status', 200]], 5]],
+            'histograms': [],
+        }))
+        text = client.get('/api/v1/metrics/').content.decode()
+        assert metric(text, 'http_requests_total',
+                      route='genres-list') == local + 5, (
+            'Проверьте, что метрики процессов из METRICS_DIR суммируются'
+        )
+        assert len(list(tmp_path.glob('metrics-*.json'))) == 2
+
+    @pytest.mark.django_db(transaction=True)
+    def test_05_unknown_methods(self, client, collector):
+        for method in ('AAA1', 'AAA2'):
+            client.generic(method, '/api/v1/titles/')
+        text = client.get('/api/v1/metrics/').content.decode()
+        assert 'AAA' not in text, (
+            'Проверьте, что нестандартные методы не заводят '
+            'своих рядов метрик'
+        )
+        assert metric(text, 'http_requests_total', route='titles-list',
+                      method='other') == 2
@@ -0,0 +1,85 @@
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+from django.db import connection
+
+from .common import create_comments
+
+
+@pytest.fixture
+def sql_stats(settings):
+    from api.sqlstats import install, sql_stats
+    settings.SQL_STATS = True
+    # Тестовое соединение уже открыто, подключаем сбор к нему вручную.
+    install(sender=None, connection=connection)
+    yield sql_stats
+    connection.execute_wrappers.remove(sql_stats)
+    sql_stats.stats = {}
+
+
+class Test19SqlStats:
+
+    def test_01_fingerprint(self):
+        from api.sqlstats import fingerprint
+        assert fingerprint(
+            'SELECT "id" FROM "t" WHERE "id" IN (%s, %s, %s)\n'
+            "AND name = 'x''y' LIMIT 21"
+        ) == 'SELECT "id" FROM "t" WHERE "id" IN (...) AND name = ? LIMIT ?'
+        assert fingerprint('SELECT "t"."id" FROM "t" WHERE "id" IN (%s)') \
+            == fingerprint('SELECT "t"."id" FROM "t" WHERE "id" IN (%s, %s)')
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_endpoint(self, sql_stats, admin_client, user_client, admin,
+                         settings):
+        # Повторные GET должны доходить до БД, а не до кэша ответов.
+        settings.RESPONSE_CACHE = False
+        comments, reviews, titles, _, _ = create_comments(admin_client, admin)
+        url = (f'/api/v1/titles/{titles[0]["id"]}/reviews/'
+               f'{reviews[0]["id"]}/comments/')
+        for _ in range(3):
+            admin_client.get(url)
+        response = admin_client.get('/api/v1/sqlstats/?order=calls&limit=50')
+        assert response.status_code == 200
+        rows = response.json()
+        assert len(rows) <= 50
+        comment_rows = [row for row in rows
+                        if row['query'].startswith('SELECT')
+                        and 'FROM "reviews_comment"' in row['query']]
+        assert comment_rows and comment_rows[0]['calls'] >= 3, (
+            'Проверьте, что запросы `CommentViewSet` собираются '
+            'по отпечаткам'
+        )
+        assert '%s' not in ''.join(row['query'] for row in rows)
+        assert user_client.get('/api/v1/sqlstats/').status_code == 403
+        assert admin_client.get(
+            '/api/v1/sqlstats/?order=bad'
+        ).status_code == 400
+
+    @pytest.mark.django_db(transaction=True)
+    def test_03_command_reads_dumps(self, sql_stats, settings, tmp_path,
+                                    admin_client):
+        settings.METRICS_DIR = str(tmp_path)
+        admin_client.get('/api/v1/users/')
+        sql_stats.flush(force=True)
+        out = StringIO()
+        call_command('sqlstats', order='calls', stdout=out)
+        assert 'FROM "users_user"' in out.getvalue(), (
+            'Проверьте, что `sqlstats` показывает статистику из METRICS_DIR'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_04_rows(self, sql_stats, admin):
+        from django.contrib.auth import get_user_model
+        User = get_user_model()
+        for name in ('first', 'second'):
+            User.objects.create(username=name, email=f'{name}@yamdb.fake')
+        sql_stats.stats = {}
+        assert len(User.objects.all()) == 3
+        assert User.objects.filter(username='first').exists()
+        rows = [row['rows'] for row in sql_stats.top(order='rows')
+                if 'FROM "users_user"' in row['query']]
+        assert rows == [3, 1], (
+            'Проверьте, что `rows` считает выбранные строки SELECT, '
+            f'даже если драйвер не заполняет rowcount: {rows}'
+        )
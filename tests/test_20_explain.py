@@ -0,0 +1,52 @@
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+from django.core.management.base import CommandError
+
+
+def explain(**options):
+    call_command('generatedata', users=10, categories=2, genres=3,
+                 titles=20, reviews=30, comments=30, stdout=StringIO())
+    out = StringIO()
+    call_command('explainqueries', stdout=out, stderr=StringIO(), **options)
+    return out.getvalue()
+
+
+class Test20ExplainQueries:
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_all_endpoints(self):
+        output = explain(all=True)
+        for name in ('titles_filter_category_genre_name_year',
+                     'reviews_list', 'comments_list', 'users_list'):
+            assert f'{name}: GET ' in output, (
+                f'Проверьте, что `explainqueries` разбирает сценарий {name}'
+            )
+        assert 'SEARCH' in output and 'reviews_review' in output
+        assert '! full scan: SCAN subquery' not in output, (
+            'Проверьте, что просмотр подзапроса не считается '
+            'полным просмотром таблицы'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_fail_on_findings(self):
+        with pytest.raises(CommandError):
+            explain(scenario=['titles_filter_category_genre'], fail=True)
+
+    @pytest.mark.django_db(transaction=True)
+    def test_03_year_filter_uses_index(self):
+        output = explain(scenario=['titles_filter_year'])
+        assert 'SCAN reviews_title' not in output, (
+            'Проверьте, что фильтр по году использует индекс Title(year)'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_04_pk_order_with_limit(self):
+        # С --fail найденный полный просмотр завершил бы команду ошибкой.
+        output = explain(scenario=['users_list'], fail=True, all=True)
+        assert 'SCAN users_user' in output
+        assert '! full scan' not in output, (
+            'Проверьте, что первые строки по первичному ключу '
+            'не считаются полным просмотром таблицы'
+        )
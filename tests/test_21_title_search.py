@@ -0,0 +1,90 @@
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+
+from .common import create_categories, create_genre
+
+
+def post_title(admin_client, name):
+    data = {'name': name, 'year': 1994, 'genre': ['drama'],
+            'category': 'films', 'description': 'Описание'}
+    response = admin_client.post('/api/v1/titles/', data=data)
+    assert response.status_code == 201
+    return response.json()
+
+
+def found(client, query):
+    response = client.get(f'/api/v1/titles/?{query}')
+    assert response.status_code == 200
+    return [title['name'] for title in response.json()['results']]
+
+
+class Test21TitleSearch:
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_unicode_case_insensitive(self, client, admin_client):
+        create_genre(admin_client)
+        create_categories(admin_client)
+        post_title(admin_client, 'Побег из Шоушенка')
+        post_title(admin_client, 'Straße')
+        for query in ('name=шоушенк', 'name=ПОБЕГ', 'name=Из ш',
+                      'name_prefix=поБЕ', 'name=STRASSE'):
+            assert found(client, query), (
+                f'Проверьте, что `?{query}` находит произведение '
+                'без учёта регистра'
+            )
+        assert found(client, 'name_prefix=из') == []
+        assert found(client, 'name_prefix=straß') == ['Straße']
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_kept_in_sync(self, admin_client, tmp_path):
+        from reviews.models import Title
+        create_genre(admin_client)
+        create_categories(admin_client)
+        title = post_title(admin_client, 'Игра Престолов')
+        admin_client.patch(f'/api/v1/titles/{title["id"]}/',
+                           data={'name': 'Ведьмак'})
+        assert Title.objects.get().search_name == 'ведьмак'
+        path = tmp_path / 'titles.csv'
+        path.write_text(
+            f'id,name,year,description\n{title["id"]},ДЮНА,1965,Описание\n',
+            encoding='utf-8'
+        )
+        call_command('importcsv', path=str(path), model_name='reviews.Title',
+                     incremental=True, stdout=StringIO())
+        assert Title.objects.get().search_name == 'дюна', (
+            'Проверьте, что `importcsv --incremental` обновляет search_name'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_03_prefix_uses_index(self):
+        call_command('generatedata', users=5, categories=2, genres=3,
+                     titles=50, reviews=10, comments=0, stdout=StringIO())
+        out = StringIO()
+        call_command('explainqueries', scenario=['titles_filter_name_prefix'],
+                     all=True, stdout=out, stderr=StringIO())
+        output = out.getvalue()
+        assert 'search_name' in output
+        assert 'SCAN reviews_title\n' not in output, (
+            'Проверьте, что `?name_prefix=` использует индекс search_name'
+        )
+
+    def test_04_search_name_length(self):
+        import sys
+        import unicodedata
+
+        from reviews.fields import MAX_EXPANSION, normalize
+        from reviews.models import Title
+        longest = max(
+            len(normalize(chr(code))) for code in range(sys.maxunicode + 1)
+            if not 0xD800 <= code <= 0xDFFF
+        )
+        assert longest <= MAX_EXPANSION, (
+            f'Unicode {unicodedata.unidata_version}: один символ после '
+            f'normalize() даёт {longest} символов, увеличьте MAX_EXPANSION'
+        )
+        name = Title._meta.get_field('name').max_length
+        assert Title._meta.get_field('search_name').max_length >= (
+            name * MAX_EXPANSION
+        ), 'Проверьте, что search_name вмещает нормализованное имя'
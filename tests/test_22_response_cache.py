@@ -0,0 +1,126 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from api import cache as response_cache
+from api import pagination
+
+from .common import auth_client, create_titles, create_users_api
+
+
+@pytest.fixture
+def lookups(monkeypatch):
+    """Результаты обращений к кэшу ответов: True — попадание."""
+    result = []
+    monkeypatch.setattr(
+        response_cache, 'cache_result',
+        lambda name, hit: result.append(hit)
+    )
+    return result
+
+
+def cached_get(client, url, lookups):
+    """GET, который должен быть отдан из кэша без запросов к БД."""
+    lookups.clear()
+    with CaptureQueriesContext(connection) as context:
+        response = client.get(url)
+    assert response.status_code == 200
+    assert lookups == [True], (
+        f'Проверьте, что повторный GET запрос `{url}` отдаётся из кэша'
+    )
+    assert not context.captured_queries, (
+        f'Проверьте, что ответ на `{url}` из кэша не обращается к БД'
+    )
+    return response.json()
+
+
+class Test22ResponseCache:
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_repeated_reads(self, client, admin_client, lookups):
+        titles, _, _ = create_titles(admin_client)
+        for url in ('/api/v1/titles/', f'/api/v1/titles/{titles[0]["id"]}/',
+                    '/api/v1/titles/?year=2000&name=пов',
+                    '/api/v1/categories/', '/api/v1/genres/'):
+            data = client.get(url).json()
+            assert cached_get(client, url, lookups) == data
+        data = client.get('/api/v1/titles/?name=пов&year=2000').json()
+        assert lookups[-1] is True, (
+            'Проверьте, что порядок параметров запроса '
+            'не влияет на ключ кэша'
+        )
+        assert data['count'] == 1
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_writes_invalidate(self, client, admin_client, lookups):
+        titles, _, _ = create_titles(admin_client)
+        detail = f'/api/v1/titles/{titles[0]["id"]}/'
+        for url in ('/api/v1/titles/', detail,
+                    '/api/v1/categories/', '/api/v1/genres/'):
+            client.get(url)
+
+        admin_client.patch(detail, data={'name': 'Новое имя'})
+        assert client.get(detail).json()['name'] == 'Новое имя', (
+            'Проверьте, что изменение произведения сбрасывает кэш его ответа'
+        )
+        cached_get(client, '/api/v1/categories/', lookups)
+
+        user, _ = create_users_api(admin_client)
+        auth_client(user).post(f'{detail}reviews/',
+                               data={'text': 'Отзыв', 'score': 7})
+        assert client.get(detail).json()['rating'] == 7, (
+            'Проверьте, что новый отзыв сбрасывает кэш рейтинга произведения'
+        )
+
+        admin_client.post('/api/v1/categories/',
+                          data={'name': 'Музыка', 'slug': 'music'})
+        data = client.get('/api/v1/categories/').json()
+        assert data['count'] == 3, (
+            'Проверьте, что новая категория сбрасывает кэш списка категорий'
+        )
+        cached_get(client, '/api/v1/genres/', lookups)
+
+        admin_client.delete('/api/v1/genres/drama/')
+        data = client.get(f'/api/v1/titles/{titles[1]["id"]}/').json()
+        assert data['genre'] == [], (
+            'Проверьте, что удаление жанра сбрасывает кэш произведений'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_03_disabled(self, client, admin_client, lookups, settings):
+        settings.RESPONSE_CACHE = False
+        create_titles(admin_client)
+        client.get('/api/v1/titles/')
+        client.get('/api/v1/titles/')
+        assert lookups == [], (
+            'Проверьте, что при RESPONSE_CACHE=False '
+            'кэш ответов не используется'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_04_file_backend(self, client, admin_client, lookups, settings,
+                             tmp_path):
+        settings.CACHES = {'default': {
+            'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+            'LOCATION': str(tmp_path),
+        }}
+        titles, _, _ = create_titles(admin_client)
+        data = client.get('/api/v1/titles/').json()
+        assert cached_get(client, '/api/v1/titles/', lookups) == data
+        assert any(tmp_path.iterdir()), (
+            'Проверьте, что кэш ответов работает с файловым бэкендом'
+        )
+        admin_client.delete(f'/api/v1/titles/{titles[0]["id"]}/')
+        assert client.get('/api/v1/titles/').json()['count'] == 1
+
+    @pytest.mark.django_db(transaction=True)
+    def test_05_host_in_key(self, client, admin_client, monkeypatch):
+        monkeypatch.setattr(pagination.OptionalCountPagination,
+                            'page_size', 1)
+        create_titles(admin_client)
+        client.get('/api/v1/titles/', HTTP_HOST='evil.example')
+        data = client.get('/api/v1/titles/').json()
+        assert data['next'].startswith('http://testserver/'), (
+            'Проверьте, что ответ, закэшированный для другого Host, '
+            'не отдаётся со ссылками на этот Host'
+        )
@@ -0,0 +1,165 @@
+import json
+
+import pytest
+
+from .common import auth_client, create_comments
+from .test_22_response_cache import cached_get, lookups  # noqa: F401
+
+
+def urls(title_id, review_id):
+    reviews = f'/api/v1/titles/{title_id}/reviews/'
+    return reviews, f'{reviews}{review_id}/comments/'
+
+
+class Test23TitleVersions:
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_writes_stay_within_title(self, client, admin_client, admin,
+                                         lookups):  # noqa: F811
+        comments, reviews, titles, user, _ = create_comments(
+            admin_client, admin
+        )
+        other_review = auth_client(user).post(
+            f'/api/v1/titles/{titles[1]["id"]}/reviews/',
+            data={'text': 'Другое', 'score': 9}
+        ).json()['id']
+        hot = urls(titles[0]['id'], reviews[0]['id'])
+        other = urls(titles[1]['id'], other_review)
+        for url in (*hot, *other):
+            client.get(url)
+
+        admin_client.post(hot[1], data={'text': 'Ещё комментарий'})
+        assert client.get(hot[1]).json()['count'] == len(comments) + 1, (
+            'Проверьте, что новый комментарий сбрасывает кэш '
+            'комментариев своего произведения'
+        )
+        for url in other:
+            cached_get(client, url, lookups)
+
+        admin_client.patch(f'{hot[0]}{reviews[1]["id"]}/',
+                           data={'text': 'Исправлено'})
+        data = client.get(hot[0]).json()
+        assert 'Исправлено' in [item['text'] for item in data['results']], (
+            'Проверьте, что изменение отзыва сбрасывает кэш '
+            'отзывов своего произведения'
+        )
+        for url in other:
+            cached_get(client, url, lookups)
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_cascades(self, client, admin_client, admin,
+                         lookups):  # noqa: F811
+        comments, reviews, titles, user, _ = create_comments(
+            admin_client, admin
+        )
+        reviews_url, comments_url = urls(titles[0]['id'], reviews[0]['id'])
+        client.get(reviews_url)
+        client.get(comments_url)
+
+        admin_client.delete(f'/api/v1/users/{user.username}/')
+        data = client.get(comments_url).json()
+        assert data['count'] == len(comments) - 1, (
+            'Проверьте, что каскадное удаление комментариев вместе '
+            'с пользователем сбрасывает кэш'
+        )
+        data = client.get(reviews_url).json()
+        assert data['count'] == len(reviews) - 1, (
+            'Проверьте, что каскадное удаление отзывов вместе '
+            'с пользователем сбрасывает кэш'
+        )
+
+        admin_client.delete(f'/api/v1/titles/{titles[0]["id"]}/')
+        for url in (reviews_url, comments_url):
+            assert client.get(url).status_code == 404, (
+                'Проверьте, что после удаления произведения '
+                'его отзывы не отдаются из кэша'
+            )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_03_username_change(self, client, admin_client, admin,
+                                lookups):  # noqa: F811
+        _, reviews, titles, user, _ = create_comments(admin_client, admin)
+        reviews_url, _ = urls(titles[0]['id'], reviews[0]['id'])
+        client.get(reviews_url)
+        admin_client.patch(f'/api/v1/users/{user.username}/',
+                           data={'bio': 'Новое о себе', 'role': 'moderator'})
+        admin_client.post('/api/v1/users/', data={
+            'username': 'newbie', 'email': 'newbie@yamdb.fake'
+        })
+        cached_get(client, reviews_url, lookups)
+        admin_client.patch(f'/api/v1/users/{user.username}/',
+                           data={'username': 'renamed'})
+        data = client.get(reviews_url).json()
+        assert 'renamed' in [item['author'] for item in data['results']], (
+            'Проверьте, что смена имени пользователя сбрасывает кэш '
+            'отзывов с его авторством'
+        )
+
+
+def populate(count):
+    """count пользователей с отзывами на count произведений.
+
+    Каждый отзыв комментирует следующий по порядку пользователь.
+    """
+    from django.contrib.auth import get_user_model
+    from reviews.models import Comment, Review, Title
+    users = [
+        get_user_model().objects.create(
+            username=f'user{count}-{i}', email=f'user{count}-{i}@yamdb.fake'
+        )
+        for i in range(count)
+    ]
+    titles = [
+        Title.objects.create(
+            name=f'Произведение {count}-{i}', year=2000, description=''
+        )
+        for i in range(count)
+    ]
+    for title in titles:
+        for i, user in enumerate(users):
+            review = Review.objects.create(
+                title=title, author=user, text='Отзыв', score=i + 1
+            )
+            Comment.objects.create(review=review, author=users[i - 1],
+                                   text='Комментарий')
+    return users, titles
+
+
+def delete_queries(obj):
+    from django.db import connection
+    from django.test.utils import CaptureQueriesContext
+    with CaptureQueriesContext(connection) as context:
+        obj.delete()
+    return len(context.captured_queries)
+
+
+class Test23CascadeDelete:
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_queries_do_not_grow(self):
+        counts = []
+        for count in (3, 8):
+            users, titles = populate(count)
+            counts.append([delete_queries(obj) for obj in (
+                users[0], titles[0], titles[1].reviews.first()
+            )])
+        assert counts[0] == counts[1], (
+            'Проверьте, что число запросов при каскадном удалении '
+            'пользователя, произведения и отзыва не растёт '
+            f'с числом строк: {counts}'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_rating_after_author_delete(self):
+        from reviews.models import Title
+        users, titles = populate(3)
+        users[2].delete()
+        title = Title.objects.get(pk=titles[1].pk)
+        assert (title.rating_sum, title.rating_count) == (3, 2), (
+            'Проверьте, что удаление пользователя вычитает его оценки '
+            'из рейтинга произведений'
+        )
+        assert json.loads(title.card)['rating'] == 1, (
+            'Проверьте, что удаление пользователя перестраивает '
+            'карточки его произведений'
+        )
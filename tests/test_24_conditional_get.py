@@ -0,0 +1,134 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from .common import auth_client, create_reviews
+from .test_22_response_cache import lookups  # noqa: F401
+
+
+def not_modified(client, url, **headers):
+    with CaptureQueriesContext(connection) as context:
+        response = client.get(url, **headers)
+    assert response.status_code == 304, (
+        f'Проверьте, что условный GET запрос `{url}` без изменений '
+        'возвращает статус 304'
+    )
+    return response, context.captured_queries
+
+
+class Test24ConditionalGet:
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_validators(self, client, admin_client, admin,
+                           lookups):  # noqa: F811
+        reviews, titles, _, _ = create_reviews(admin_client, admin)
+        for url in ('/api/v1/titles/', f'/api/v1/titles/{titles[0]["id"]}/',
+                    f'/api/v1/titles/{titles[0]["id"]}/reviews/',
+                    f'/api/v1/titles/{titles[0]["id"]}/reviews/'
+                    f'{reviews[0]["id"]}/comments/',
+                    '/api/v1/categories/', '/api/v1/genres/'):
+            response = client.get(url)
+            etag = response['ETag']
+            assert etag.startswith('"') and response['Last-Modified'], (
+                f'Проверьте, что ответ на `{url}` содержит ETag '
+                'и Last-Modified'
+            )
+            lookups.clear()
+            response, queries = not_modified(
+                client, url, HTTP_IF_NONE_MATCH=etag
+            )
+            assert not queries and not lookups, (
+                f'Проверьте, что 304 на `{url}` отдаётся по версиям, '
+                'без запросов к БД и кэша ответов'
+            )
+            assert response['ETag'] == etag
+            not_modified(client, url, HTTP_IF_MODIFIED_SINCE=response[
+                'Last-Modified'
+            ])
+        response = client.head(url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == 304, (
+            'Проверьте, что HEAD запрос тоже учитывает If-None-Match'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_writes_change_etag(self, client, admin_client, admin):
+        reviews, titles, user, _ = create_reviews(admin_client, admin)
+        detail = f'/api/v1/titles/{titles[0]["id"]}/'
+        other = f'/api/v1/titles/{titles[1]["id"]}/reviews/'
+        etags = {url: client.get(url)['ETag']
+                 for url in (detail, f'{detail}reviews/', other)}
+
+        admin_client.patch(detail, data={'description': 'Новое описание'})
+        response = client.get(detail, HTTP_IF_NONE_MATCH=etags[detail])
+        assert response.status_code == 200, (
+            'Проверьте, что изменение произведения меняет его ETag'
+        )
+        assert response.json()['description'] == 'Новое описание'
+        assert response['ETag'] != etags[detail]
+
+        auth_client(user).patch(f'{detail}reviews/{reviews[1]["id"]}/',
+                                data={'text': 'Другой текст'})
+        response = client.get(f'{detail}reviews/',
+                              HTTP_IF_NONE_MATCH=etags[f'{detail}reviews/'])
+        assert response.status_code == 200, (
+            'Проверьте, что изменение отзыва меняет ETag отзывов произведения'
+        )
+        not_modified(client, other, HTTP_IF_NONE_MATCH=etags[other])
+
+    @pytest.mark.django_db(transaction=True)
+    def test_03_users(self, admin_client, user_client, moderator_client):
+        etag = admin_client.get('/api/v1/users/')['ETag']
+        not_modified(admin_client, '/api/v1/users/', HTTP_IF_NONE_MATCH=etag)
+        admin_client.post('/api/v1/users/', data={
+            'username': 'newbie', 'email': 'newbie@yamdb.fake'
+        })
+        response = admin_client.get('/api/v1/users/', HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == 200, (
+            'Проверьте, что новый пользователь меняет ETag списка'
+        )
+
+        mine = user_client.get('/api/v1/users/me/')['ETag']
+        response = moderator_client.get('/api/v1/users/me/',
+                                        HTTP_IF_NONE_MATCH=mine)
+        assert response.status_code == 200, (
+            'Проверьте, что ETag `/api/v1/users/me/` '
+            'зависит от пользователя'
+        )
+        not_modified(user_client, '/api/v1/users/me/',
+                     HTTP_IF_NONE_MATCH=mine)
+        user_client.patch('/api/v1/users/me/', data={'bio': 'Новое'})
+        response = user_client.get('/api/v1/users/me/',
+                                   HTTP_IF_NONE_MATCH=mine)
+        assert response.status_code == 200, (
+            'Проверьте, что изменение профиля меняет ETag '
+            '`/api/v1/users/me/`'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_04_missing_and_invalid(self, client, admin_client, admin):
+        _, titles, _, _ = create_reviews(admin_client, admin)
+        future = 'Fri, 01 Jan 2100 00:00:00 GMT'
+        for url, status in (
+            ('/api/v1/titles/99999/', 404),
+            ('/api/v1/titles/?genre=nope', 400),
+            ('/api/v1/titles/99999/reviews/', 404),
+            ('/api/v1/titles/99999/reviews/1/comments/', 404),
+        ):
+            response = client.get(url, HTTP_IF_MODIFIED_SINCE=future)
+            assert response.status_code == status, (
+                f'Проверьте, что условный GET запрос `{url}` возвращает '
+                f'статус {status}, а не 304'
+            )
+            response = client.get(url, HTTP_IF_NONE_MATCH='*')
+            assert response.status_code == status, (
+                f'Проверьте, что `If-None-Match: *` для `{url}` '
+                'не даёт 304'
+            )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_05_disabled(self, client, settings):
+        settings.CONDITIONAL_GET = False
+        response = client.get('/api/v1/categories/')
+        assert 'ETag' not in response, (
+            'Проверьте, что при CONDITIONAL_GET=False ETag не выставляется'
+        )
@@ -0,0 +1,103 @@
+import fcntl
+import threading
+import time
+
+import pytest
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from rest_framework.response import Response
+
+from api import cache as response_cache
+from api.views import TitleViewSet
+
+from .common import create_titles
+
+
+class Test25StaleCache:
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_stale_while_rebuilding(self, client, admin_client,
+                                       monkeypatch):
+        titles, _, _ = create_titles(admin_client)
+        detail = f'/api/v1/titles/{titles[0]["id"]}/'
+        old = client.get(detail).json()
+        admin_client.patch(detail, data={'name': 'Новое имя'})
+
+        # Перестройку уже ведёт другой запрос.
+        monkeypatch.setattr(response_cache.RebuildLock, 'acquire',
+                            lambda self, timeout=0: False)
+        with CaptureQueriesContext(connection) as context:
+            response = client.get(detail)
+        assert response.json() == old, (
+            'Проверьте, что во время перестройки отдаётся устаревший ответ'
+        )
+        assert not context.captured_queries
+        assert 'ETag' not in response, (
+            'Проверьте, что устаревший ответ не получает ETag новых версий'
+        )
+
+        monkeypatch.undo()
+        assert client.get(detail).json()['name'] == 'Новое имя', (
+            'Проверьте, что запрос, взявший блокировку, '
+            'перестраивает ответ'
+        )
+        assert client.get(detail).json()['name'] == 'Новое имя'
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_single_flight(self, monkeypatch):
+        calls = []
+
+        def slow_list(self, request, *args, **kwargs):
+            calls.append(threading.get_ident())
+            time.sleep(0.2)
+            return Response({'calls': len(calls)})
+
+        monkeypatch.setattr(TitleViewSet, 'list', slow_list)
+        cache.clear()
+        results = []
+
+        def get():
+            response = Client().get('/api/v1/titles/?year=1999')
+            results.append((response.status_code, response.json()))
+
+        threads = [threading.Thread(target=get) for _ in range(5)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert len(calls) == 1, (
+            'Проверьте, что одинаковые одновременные запросы '
+            'к пустому кэшу строят ответ один раз'
+        )
+        assert results == [(200, {'calls': 1})] * 5
+
+    def test_03_lock(self, settings, tmp_path):
+        settings.RESPONSE_CACHE_LOCK_DIR = str(tmp_path)
+        first = response_cache.RebuildLock('response:key')
+        second = response_cache.RebuildLock('response:key')
+        assert first.acquire()
+        assert not second.acquire(), (
+            'Проверьте, что ключ перестраивает один поток процесса'
+        )
+        first.close()
+        with open(second.path(), 'a') as file:
+            # Так блокировку держал бы другой процесс хоста.
+            fcntl.flock(file, fcntl.LOCK_EX)
+            assert not second.acquire(0.05), (
+                'Проверьте, что ключ перестраивает один процесс хоста'
+            )
+        assert second.acquire(0.05)
+        second.close()
+        assert not response_cache.RebuildLock._locks, (
+            'Проверьте, что блокировки отпущенных ключей не копятся'
+        )
+        for number in range(response_cache.LOCK_FILES * 2):
+            lock = response_cache.RebuildLock(f'response:{number}')
+            assert lock.acquire()
+            lock.close()
+        assert len(list(tmp_path.iterdir())) <= response_cache.LOCK_FILES, (
+            'Проверьте, что число файлов блокировок не растёт '
+            'с числом ключей'
+        )
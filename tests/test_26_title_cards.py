@@ -0,0 +1,119 @@
+import json
+
+import pytest
+
+from api.serializers import TitleReadSerializer
+
+from .common import auth_client, create_titles, create_users_api
+
+
+def card(title_id):
+    from reviews.models import Title
+    return json.loads(Title.objects.get(pk=title_id).card or 'null')
+
+
+class Test26TitleCards:
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_read_from_cards(self, client, admin_client, settings,
+                                monkeypatch):
+        settings.RESPONSE_CACHE = False
+        titles, _, _ = create_titles(admin_client)
+        detail = f'/api/v1/titles/{titles[0]["id"]}/'
+        settings.TITLE_CARDS = False
+        expected = [client.get(url).json() for url in (
+            '/api/v1/titles/', detail, '/api/v1/titles/?year=2000'
+        )]
+        assert card(titles[0]['id']) == expected[1], (
+            'Проверьте, что карточка совпадает с выводом '
+            '`TitleReadSerializer`'
+        )
+
+        settings.TITLE_CARDS = True
+
+        def fail(self, instance):
+            raise AssertionError('serializer called')
+
+        monkeypatch.setattr(TitleReadSerializer, 'to_representation', fail)
+        got = [client.get(url).json() for url in (
+            '/api/v1/titles/', detail, '/api/v1/titles/?year=2000'
+        )]
+        assert got == expected, (
+            'Проверьте, что ответы, склеенные из карточек, совпадают '
+            'с ответами сериализатора'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_change_hooks(self, admin_client):
+        from reviews.models import Genre, Title
+        titles, _, genres = create_titles(admin_client)
+        title_id = titles[0]['id']
+        admin_client.patch(f'/api/v1/titles/{title_id}/', data={
+            'name': 'Другое имя', 'genre': [genres[2]['slug']]
+        })
+        assert card(title_id)['name'] == 'Другое имя'
+        assert [item['slug'] for item in card(title_id)['genre']] == [
+            genres[2]['slug']
+        ], 'Проверьте, что карточка перестраивается после смены жанров'
+
+        user, _ = create_users_api(admin_client)
+        auth_client(user).post(f'/api/v1/titles/{title_id}/reviews/',
+                               data={'text': 'Отзыв', 'score': 8})
+        assert card(title_id)['rating'] == 8, (
+            'Проверьте, что карточка перестраивается после нового отзыва'
+        )
+
+        Genre.objects.filter(slug=genres[0]['slug']).update(name='Хоррор')
+        Title.objects.get(pk=title_id).genre.add(
+            Genre.objects.get(slug=genres[0]['slug'])
+        )
+        assert 'Хоррор' in [item['name'] for item in card(title_id)['genre']]
+        genre = Genre.objects.get(slug=genres[0]['slug'])
+        genre.name = 'Ужасы'
+        genre.save()
+        assert 'Ужасы' in [item['name'] for item in card(title_id)['genre']], (
+            'Проверьте, что изменение жанра перестраивает карточки '
+            'его произведений'
+        )
+
+        admin_client.delete(f'/api/v1/genres/{genres[2]["slug"]}/')
+        assert genres[2]['slug'] not in [
+            item['slug'] for item in card(title_id)['genre']
+        ], 'Проверьте, что удаление жанра перестраивает карточки'
+        admin_client.delete(f'/api/v1/categories/{titles[0]["category"]}/')
+        assert card(title_id)['category'] is None, (
+            'Проверьте, что удаление категории перестраивает карточки'
+        )
+        assert card(titles[1]['id'])['category'] is not None, (
+            'Проверьте, что перестраиваются только затронутые карточки'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_03_bulk_import(self, client, admin_client):
+        from reviews.models import Title
+        from reviews.signals import bulk_imported
+        titles, _, _ = create_titles(admin_client)
+        bulk_imported.send(sender=Title)
+        assert card(titles[0]['id']) is None, (
+            'Проверьте, что после массовой загрузки карточки сбрасываются'
+        )
+        data = client.get('/api/v1/titles/').json()
+        assert data['count'] == 2 and data['results'][0]['name']
+        assert card(titles[0]['id']) is not None, (
+            'Проверьте, что пустые карточки строятся при чтении'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_04_read_keeps_fresh_card(self, admin_client):
+        from api.cards import fill_cards
+        from reviews.models import Title
+        titles, _, _ = create_titles(admin_client)
+        Title.objects.update(card='')
+        stale = list(Title.objects.filter(pk=titles[0]['id']))
+        # Карточку перестроили после того, как чтение взяло строку.
+        Title.objects.filter(pk=titles[0]['id']).update(card='{"fresh":1}')
+        fill_cards(stale)
+        assert card(titles[0]['id']) == {'fresh': 1}, (
+            'Проверьте, что построение карточки при чтении '
+            'не затирает записанную тем временем'
+        )